@@ -0,0 +1,105 @@
+import collections
+import math
+
+import pygame
+
+from tile import Tile
+
+
+class TileChunkCache:
+	def __init__(self, chunk_size: int = 8, max_bytes: int = 32 * 1024 * 1024, max_bakes_per_frame: int = 4):
+		self.chunk_size = chunk_size  # Chunk width and height in tiles
+
+		# Baked chunks are about a megabyte each, so the cache is capped by memory rather than by count
+		self.max_bytes = max_bytes
+		self.num_bytes = 0
+		self.largest_chunk_bytes = 0  # Room made before each bake, as the size of a chunk is only known once baked
+		self.max_bakes_per_frame = max_bakes_per_frame
+		self.bakes_left = max_bakes_per_frame
+
+		# {(tile_layer, chunk_pos): surface}, least recently drawn first. Empty chunks are stored as None
+		self.chunks: collections.OrderedDict[tuple[int, tuple[int, int]], pygame.Surface | None] = collections.OrderedDict()
+
+		# Chunks drawn this frame, which are never evicted to make room, so the visible ones aren't baked twice in a frame
+		self.drawn: set[tuple[int, tuple[int, int]]] = set()
+
+	def __contains__(self, key: tuple[int, tuple[int, int]]) -> bool:
+		return key in self.chunks
+
+	def get_chunk_pos(self, tile_pos: tuple[int, int]) -> tuple[int, int]:
+		return tile_pos[0] // self.chunk_size, tile_pos[1] // self.chunk_size
+
+	def new_frame(self):
+		self.bakes_left = self.max_bakes_per_frame
+		self.drawn.clear()
+
+	def can_bake(self) -> bool:
+		# Once the budget is spent on chunks drawn this frame, the rest are drawn tile by tile instead
+		return self.bakes_left > 0 and self.make_room(self.largest_chunk_bytes)
+
+	def make_room(self, num_bytes: int) -> bool:
+		# Chunks that have not been drawn for the longest are the furthest from the camera
+		while self.num_bytes + num_bytes > self.max_bytes and len(self.chunks) > 0:
+			oldest_key = next(iter(self.chunks))
+			if oldest_key in self.drawn:
+				break
+
+			self.num_bytes -= self.get_size(self.chunks.pop(oldest_key))
+
+		return self.num_bytes + num_bytes <= self.max_bytes
+
+	def get_chunk(self, layer_index: int, chunk_pos: tuple[int, int], layer: dict[tuple[int, int], Tile], tile_step: float) -> pygame.Surface | None:
+		key = (layer_index, chunk_pos)
+		self.drawn.add(key)
+
+		if key in self.chunks:
+			self.chunks.move_to_end(key)
+			return self.chunks[key]
+
+		self.bakes_left -= 1
+		chunk = self._bake(chunk_pos, layer, tile_step)
+		chunk_bytes = self.get_size(chunk)
+		self.largest_chunk_bytes = max(self.largest_chunk_bytes, chunk_bytes)
+
+		# Only kept if there is room for it, otherwise it is just drawn this frame rather than going over the budget
+		if self.make_room(chunk_bytes):
+			self.chunks[key] = chunk
+			self.num_bytes += chunk_bytes
+
+		return chunk
+
+	@staticmethod
+	def get_size(chunk: pygame.Surface | None) -> int:
+		if chunk is None:
+			return 0
+		return chunk.get_width() * chunk.get_height() * chunk.get_bytesize()
+
+	def _bake(self, chunk_pos: tuple[int, int], layer: dict[tuple[int, int], Tile], tile_step: float) -> pygame.Surface | None:
+		start_col = chunk_pos[0] * self.chunk_size
+		start_row = chunk_pos[1] * self.chunk_size
+
+		tiles = []
+		for row in range(start_row, start_row + self.chunk_size):
+			for col in range(start_col, start_col + self.chunk_size):
+				tile = layer.get((col, row))
+				if tile is not None:
+					tiles.append((tile.image, ((col - start_col) * tile_step, (row - start_row) * tile_step)))
+
+		if len(tiles) == 0:
+			return None
+
+		# Parallax images are scaled up slightly, so they spill over the edge of the chunk
+		max_image_size = max(max(image.get_width(), image.get_height()) for image, _ in tiles)
+		chunk_size = math.ceil((self.chunk_size - 1) * tile_step) + max_image_size
+
+		surface = pygame.Surface((chunk_size, chunk_size), flags=pygame.SRCALPHA)
+		surface.blits(tiles, doreturn=False)
+
+		return surface
+
+	def invalidate(self, layer_index: int, tile_pos: tuple[int, int]):
+		self.num_bytes -= self.get_size(self.chunks.pop((layer_index, self.get_chunk_pos(tile_pos)), None))
+
+	def clear(self):
+		self.chunks.clear()
+		self.num_bytes = 0
@@ -0,0 +1,325 @@
+import enum
+import math
+
+import pygame
+
+
+# How far, in pixels, something can already be inside a collider and still be stopped by it, for float error at contact
+SWEEP_TOLERANCE = 1e-3
+
+# How far, in pixels, shapes are pushed past the edge of a collider, so they end up clear of it rather than touching it
+PUSH_OUT_MARGIN = 1e-2
+
+
+def sweep_rect(rect: pygame.Rect | pygame.FRect, movement: tuple[float, float], colliders: list[pygame.Rect]) -> tuple[float, tuple[int, int], pygame.Rect | None]:
+	# Time of impact (0 to 1) along the movement, the normal of the side hit, and the collider hit
+	dx, dy = movement
+
+	time_of_impact = 1.0
+	normal = (0, 0)
+	hit_collider = None
+
+	for collider in colliders:
+		if dx > 0:
+			x_entry = (collider.left - rect.right) / dx
+			x_exit = (collider.right - rect.left) / dx
+		elif dx < 0:
+			x_entry = (collider.right - rect.left) / dx
+			x_exit = (collider.left - rect.right) / dx
+		elif rect.right <= collider.left or rect.left >= collider.right:
+			continue
+		else:
+			x_entry = -math.inf
+			x_exit = math.inf
+
+		if dy > 0:
+			y_entry = (collider.top - rect.bottom) / dy
+			y_exit = (collider.bottom - rect.top) / dy
+		elif dy < 0:
+			y_entry = (collider.bottom - rect.top) / dy
+			y_exit = (collider.top - rect.bottom) / dy
+		elif rect.bottom <= collider.top or rect.top >= collider.bottom:
+			continue
+		else:
+			y_entry = -math.inf
+			y_exit = math.inf
+
+		entry = max(x_entry, y_entry)
+		if entry > min(x_exit, y_exit) or entry >= time_of_impact or entry == -math.inf:
+			continue
+
+		# Colliders that the rect starts inside of are left to be resolved as overlaps
+		if entry < 0:
+			if entry * max(abs(dx), abs(dy)) < -SWEEP_TOLERANCE:
+				continue
+			entry = 0
+
+		time_of_impact = entry
+		normal = (-int(math.copysign(1, dx)), 0) if x_entry > y_entry else (0, -int(math.copysign(1, dy)))
+		hit_collider = collider
+
+	return time_of_impact, normal, hit_collider
+
+
+def get_circle_push_out(center: tuple[float, float] | pygame.Vector2, radius: float, collider: pygame.Rect) -> tuple[float, float]:
+	# Shortest movement that takes the circle out of the collider it overlaps
+	x, y = center
+	offset = pygame.Vector2(x - pygame.math.clamp(x, collider.left, collider.right), y - pygame.math.clamp(y, collider.top, collider.bottom))
+
+	if offset.length_squared() > 0:
+		# Center is outside of the collider, so straight away from the closest point on it
+		distance = offset.length()
+		if distance >= radius:
+			return 0, 0
+
+		push = offset * ((radius - distance + PUSH_OUT_MARGIN) / distance)
+		return push.x, push.y
+
+	# Center is inside of the collider, so out through the closest side
+	pushes = [
+		(collider.left - x - radius - PUSH_OUT_MARGIN, 0),
+		(collider.right - x + radius + PUSH_OUT_MARGIN, 0),
+		(0, collider.top - y - radius - PUSH_OUT_MARGIN),
+		(0, collider.bottom - y + radius + PUSH_OUT_MARGIN)
+	]
+	return min(pushes, key=lambda push: abs(push[0]) + abs(push[1]))
+
+
+def merge_spans(spans: list[tuple[int, int]]) -> list[tuple[int, int]]:
+	# Joins touching or overlapping (start, end) spans
+	spans = sorted(spans)
+
+	merged = [spans[0]]
+	for start, end in spans[1:]:
+		if start <= merged[-1][1]:
+			merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+		else:
+			merged.append((start, end))
+	return merged
+
+
+def merge_rects(rects: list[pygame.Rect]) -> list[pygame.Rect]:
+	# Greedily joins touching rects into rows, then rows with the same span into columns, covering exactly the same area
+	# {(top, bottom): [(left, right)]}
+	rows: dict[tuple[int, int], list[tuple[int, int]]] = {}
+	for rect in rects:
+		rows.setdefault((rect.top, rect.bottom), []).append((rect.left, rect.right))
+
+	# {(left, right): [(top, bottom)]}
+	columns: dict[tuple[int, int], list[tuple[int, int]]] = {}
+	for row, spans in rows.items():
+		for span in merge_spans(spans):
+			columns.setdefault(span, []).append(row)
+
+	merged = []
+	for (left, right), spans in columns.items():
+		for top, bottom in merge_spans(spans):
+			merged.append(pygame.Rect(left, top, right - left, bottom - top))
+	return merged
+
+
+class CollisionLayer(enum.IntFlag):
+	GROUND = enum.auto()  # Tile layer 0
+	WATER = enum.auto()  # Tile layer 1, only solid for things above the water
+
+
+class CollisionGrid:
+	def __init__(self, cell_size: tuple[int, int]):
+		self.cell_size = cell_size
+
+		# {layer: {cell_pos: colliders}}
+		self.cells: dict[CollisionLayer, dict[tuple[int, int], list[pygame.Rect]]] = {layer: {} for layer in CollisionLayer}
+		self.colliders: dict[CollisionLayer, list[pygame.Rect]] = {layer: [] for layer in CollisionLayer}
+
+		# {mask: layers}
+		self._mask_layers: dict[int, tuple[CollisionLayer, ...]] = {}
+
+	def _get_layers(self, mask: CollisionLayer) -> tuple[CollisionLayer, ...]:
+		layers = self._mask_layers.get(mask)
+		if layers is None:
+			layers = self._mask_layers[mask] = tuple(layer for layer in CollisionLayer if layer & mask)
+		return layers
+
+	def get_cell_pos(self, pos: tuple | pygame.Vector2) -> tuple[int, int]:
+		return int(pos[0] // self.cell_size[0]), int(pos[1] // self.cell_size[1])
+
+	def get_cell_range(self, rect: pygame.Rect) -> tuple[tuple[int, int], tuple[int, int]]:
+		# Inclusive range of cells that the rect touches
+		top_left = self.get_cell_pos(rect.topleft)
+		bottom_right = self.get_cell_pos((rect.right - 1, rect.bottom - 1))
+
+		return top_left, (max(bottom_right[0], top_left[0]), max(bottom_right[1], top_left[1]))
+
+	def add_collider(self, rect: pygame.Rect, layer: CollisionLayer = CollisionLayer.GROUND):
+		cells = self.cells[layer]
+		top_left, bottom_right = self.get_cell_range(rect)
+
+		for row in range(top_left[1], bottom_right[1] + 1):
+			for col in range(top_left[0], bottom_right[0] + 1):
+				cells.setdefault((col, row), []).append(rect)
+
+		self.colliders[layer].append(rect)
+
+	def remove_collider(self, rect: pygame.Rect, layer: CollisionLayer = CollisionLayer.GROUND):
+		cells = self.cells[layer]
+		top_left, bottom_right = self.get_cell_range(rect)
+
+		for row in range(top_left[1], bottom_right[1] + 1):
+			for col in range(top_left[0], bottom_right[0] + 1):
+				cell = cells.get((col, row))
+				if cell is not None and rect in cell:
+					cell.remove(rect)
+
+					if len(cell) == 0:
+						del cells[(col, row)]
+
+		if rect in self.colliders[layer]:
+			self.colliders[layer].remove(rect)
+
+	def clear(self):
+		for layer in CollisionLayer:
+			self.cells[layer].clear()
+			self.colliders[layer].clear()
+
+	def get_all_colliders(self, mask: CollisionLayer = CollisionLayer.GROUND) -> list[pygame.Rect]:
+		colliders = []
+		for layer in self._get_layers(mask):
+			colliders.extend(self.colliders[layer])
+		return colliders
+
+	def get_cell_colliders(self, cell_pos: tuple[int, int], mask: CollisionLayer = CollisionLayer.GROUND) -> list[pygame.Rect]:
+		layers = self._get_layers(mask)
+
+		if len(layers) == 1:
+			return self.cells[layers[0]].get(cell_pos, [])
+
+		colliders = []
+		for layer in layers:
+			cell = self.cells[layer].get(cell_pos)
+			if cell is not None:
+				colliders.extend(cell)
+		return colliders
+
+	def get_colliders(self, rect: pygame.Rect, mask: CollisionLayer = CollisionLayer.GROUND) -> list[pygame.Rect]:
+		# Colliders in the cells the rect touches, not guaranteed to overlap the rect
+		top_left, bottom_right = self.get_cell_range(rect)
+
+		# Fast path for the common case of a query inside one cell
+		if top_left == bottom_right:
+			return self.get_cell_colliders(top_left, mask)
+
+		# {id: collider}, as colliders can span several cells
+		colliders = {}
+		for layer in self._get_layers(mask):
+			cells = self.cells[layer]
+
+			for row in range(top_left[1], bottom_right[1] + 1):
+				for col in range(top_left[0], bottom_right[0] + 1):
+					cell = cells.get((col, row))
+					if cell is not None:
+						for collider in cell:
+							colliders[id(collider)] = collider
+
+		return list(colliders.values())
+
+	def sweep(self, rect: pygame.Rect | pygame.FRect, movement: tuple[float, float], mask: CollisionLayer = CollisionLayer.GROUND) -> tuple[float, tuple[int, int], pygame.Rect | None]:
+		# Colliders anywhere along the movement
+		swept_rect = pygame.Rect(rect).union(pygame.Rect(rect).move(movement)).inflate(2, 2)
+		return sweep_rect(rect, movement, self.get_colliders(swept_rect, mask))
+
+	def colliderect(self, rect: pygame.Rect, mask: CollisionLayer = CollisionLayer.GROUND) -> bool:
+		for collider in self.get_colliders(rect, mask):
+			if collider.colliderect(rect):
+				return True
+		return False
+
+	def collidepoint(self, point: tuple | pygame.Vector2, mask: CollisionLayer = CollisionLayer.GROUND) -> bool:
+		# Rects truncate float points, so the cell has to be found the same way
+		for collider in self.get_cell_colliders(self.get_cell_pos((int(point[0]), int(point[1]))), mask):
+			if collider.collidepoint(point):
+				return True
+		return False
+
+
+class SpatialHash:
+	def __init__(self, cell_size: int):
+		self.cell_size = cell_size
+
+		# {cell_pos: items}
+		self.cells: dict[tuple[int, int], list] = {}
+
+		# {item: pos}, positions are linked, so they are read when the item is moved
+		self.positions: dict[object, pygame.Vector2] = {}
+		self.item_cells: dict[object, tuple[int, int]] = {}
+
+	def __len__(self) -> int:
+		return len(self.positions)
+
+	def __contains__(self, item) -> bool:
+		return item in self.positions
+
+	def get_cell_pos(self, pos: tuple | pygame.Vector2) -> tuple[int, int]:
+		return int(pos[0] // self.cell_size), int(pos[1] // self.cell_size)
+
+	def add(self, item, pos: pygame.Vector2):
+		cell_pos = self.get_cell_pos(pos)
+
+		self.positions[item] = pos
+		self.item_cells[item] = cell_pos
+		self.cells.setdefault(cell_pos, []).append(item)
+
+	def remove(self, item):
+		cell_pos = self.item_cells.pop(item)
+		del self.positions[item]
+
+		cell = self.cells[cell_pos]
+		cell.remove(item)
+		if len(cell) == 0:
+			del self.cells[cell_pos]
+
+	def move(self, item):
+		# Only rebins the item if it moved into another cell
+		cell_pos = self.get_cell_pos(self.positions[item])
+		prev_cell_pos = self.item_cells[item]
+
+		if cell_pos != prev_cell_pos:
+			cell = self.cells[prev_cell_pos]
+			cell.remove(item)
+			if len(cell) == 0:
+				del self.cells[prev_cell_pos]
+
+			self.item_cells[item] = cell_pos
+			self.cells.setdefault(cell_pos, []).append(item)
+
+	def clear(self):
+		self.cells.clear()
+		self.positions.clear()
+		self.item_cells.clear()
+
+	def query_rect(self, rect: pygame.Rect) -> list:
+		top_left = self.get_cell_pos(rect.topleft)
+		bottom_right = self.get_cell_pos(rect.bottomright)
+
+		items = []
+		for row in range(top_left[1], bottom_right[1] + 1):
+			for col in range(top_left[0], bottom_right[0] + 1):
+				cell = self.cells.get((col, row))
+				if cell is not None:
+					for item in cell:
+						if rect.collidepoint(self.positions[item]):
+							items.append(item)
+		return items
+
+	def query_radius(self, pos: tuple | pygame.Vector2, radius: float) -> list:
+		top_left = self.get_cell_pos((pos[0] - radius, pos[1] - radius))
+		bottom_right = self.get_cell_pos((pos[0] + radius, pos[1] + radius))
+
+		items = []
+		for row in range(top_left[1], bottom_right[1] + 1):
+			for col in range(top_left[0], bottom_right[0] + 1):
+				cell = self.cells.get((col, row))
+				if cell is not None:
+					for item in cell:
+						if self.positions[item].distance_to(pos) < radius:
+							items.append(item)
+		return items
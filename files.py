@@ -5,6 +5,9 @@ import sys
 CURRENT_DIR = pathlib.Path(os.path.dirname(os.path.realpath(sys.argv[0])))
 ASSET_DIR = CURRENT_DIR / "assets"
 FONTS_DIR = ASSET_DIR / "fonts"
+REPLAY_DIR = ASSET_DIR / "replays"
+PROFILE_DIR = CURRENT_DIR / "profiles"
+CACHE_DIR = CURRENT_DIR / "cache"
 
 FONT_PATH = str(FONTS_DIR / "Raleway-Bold.ttf")
 # FONT_PATH = str(FONTS_DIR / "good times rg.otf")
@@ -0,0 +1,73 @@
+import numpy as np
+import pygame
+import pygbase
+
+
+class FixedStep:
+	def __init__(self, step_rate: int = 60, max_steps: int = 5):
+		self.delta = 1 / step_rate
+		self.max_steps = max_steps  # Per frame, so a slow frame does not need even more steps to catch up on the next
+
+		self.accumulator = 0
+
+	def add_time(self, delta: float) -> int:
+		# Number of steps to run this frame
+		self.accumulator += delta
+
+		num_steps = min(int(self.accumulator / self.delta), self.max_steps)
+		self.accumulator -= num_steps * self.delta
+
+		# Time that could not be caught up on is dropped, so the simulation slows down instead
+		if num_steps == self.max_steps:
+			self.accumulator = min(self.accumulator, self.delta)
+
+		return num_steps
+
+	def get_alpha(self) -> float:
+		# How far between the last two steps the frame is drawn at
+		return min(self.accumulator / self.delta, 1)
+
+
+class RenderInterpolator:
+	def __init__(self, camera: pygbase.Camera):
+		self.camera = camera
+		self.prev_camera_pos = camera.pos.copy()
+		self.sim_camera_pos: pygame.Vector2 | None = None
+
+		# [(linked position, position before the last step)], positions are moved in place so anything linked to them is drawn there too
+		self.prev_positions: list[tuple[pygame.Vector2, pygame.Vector2]] = []
+		self.prev_arrays: list[tuple[np.ndarray, np.ndarray]] = []
+
+		self.sim_positions: list[pygame.Vector2] = []
+		self.sim_arrays: list[np.ndarray] = []
+
+	def store(self, positions: list[pygame.Vector2], arrays: list[np.ndarray]):
+		# Called before each step
+		self.prev_camera_pos = self.camera.pos.copy()
+		self.prev_positions = [(pos, pos.copy()) for pos in positions]
+		self.prev_arrays = [(array, array.copy()) for array in arrays]
+
+	def begin(self, alpha: float):
+		# Swaps in the interpolated positions to draw with
+		self.sim_camera_pos = self.camera.pos
+		self.camera.pos = self.prev_camera_pos.lerp(self.sim_camera_pos, alpha)
+
+		self.sim_positions = [pos.copy() for pos, _ in self.prev_positions]
+		for pos, prev_pos in self.prev_positions:
+			pos.update(prev_pos.lerp(pos, alpha))
+
+		self.sim_arrays = [array.copy() for array, _ in self.prev_arrays]
+		for array, prev_array in self.prev_arrays:
+			# Arrays can change size between steps, like when particles die
+			if array.shape == prev_array.shape:
+				array[...] = prev_array + (array - prev_array) * alpha
+
+	def end(self):
+		# Puts the simulated positions back
+		self.camera.pos = self.sim_camera_pos
+
+		for (pos, _), sim_pos in zip(self.prev_positions, self.sim_positions):
+			pos.update(sim_pos)
+
+		for (array, _), sim_array in zip(self.prev_arrays, self.sim_arrays):
+			array[...] = sim_array
@@ -1,23 +1,50 @@
 import logging
+import pathlib
 import random
+from typing import Generator
 
+import numpy as np
 import pygame
 import pygbase
 
 from boss import HeartOfTheSeaBoss, BossBar
+from collision import CollisionLayer
+from fixed_step import FixedStep, RenderInterpolator
 from health_bar import HealthBar
+from input_source import InputSource
 from level import Level
+from level_file import LevelData
 from particle_collider import CollisionParticleGroup
 from player import Player
 from projectiles import ProjectileGroup, GarbageProjectile
+from spike_profiler import SpikeProfiler
+from timing import FrameTimings, TimingOverlay
 from water_monster import WaterMonster, WaterMonsterGroup
 from win_state import Win
 
 
 class Game(pygbase.GameState, name="game"):
-	def __init__(self):
+	def __init__(self, level: Level | None = None, preloaded_level_data: tuple[LevelData, pathlib.Path] | None = None, time_sliced: bool = False):
 		super().__init__()
 
+		# Loading can instead be spread over several frames by stepping through `load_steps`, like the loading screen does
+		if not time_sliced:
+			for _ in self.load_steps(level, preloaded_level_data):
+				pass
+
+	def load_steps(self, level: Level | None = None, preloaded_level_data: tuple[LevelData, pathlib.Path] | None = None) -> Generator[float, None, None]:
+		# Yields how far through loading it is, from 0 to 1
+
+		# Seeded for headless runs and replays, so every run plays out the same
+		seed = pygbase.Common.get_value("seed")
+		if seed is not None:
+			random.seed(seed)
+
+		self.input_source: InputSource = pygbase.Common.get_value("input_source")
+		self.timings: FrameTimings = pygbase.Common.get_value("frame_timings")
+		self.timing_overlay: TimingOverlay = pygbase.Common.get_value("timing_overlay")
+		self.spike_profiler: SpikeProfiler | None = pygbase.Common.get_value("spike_profiler")
+
 		self.lighting_manager = pygbase.LightingManager(1.0)
 
 		self.camera = pygbase.Camera()
@@ -31,34 +58,42 @@ class Game(pygbase.GameState, name="game"):
 		self.in_water_particle_manager = pygbase.ParticleManager(chunk_size=pygbase.Common.get_value("tile_size")[0])
 
 		# TODO: Spawn appropriate enemies based on player checkpoint
-		self.level = Level(self.particle_manager, self.in_water_particle_manager, self.lighting_manager)
+		if level is None:
+			start_checkpoint = pygbase.Common.get_value("start_checkpoint")
+			self.level = Level(self.particle_manager, self.in_water_particle_manager, self.lighting_manager, use_chunk_cache=True, start_checkpoint=start_checkpoint, time_sliced=True, stream_tiles=True)
+
+			for progress in self.level.load_steps(start_checkpoint, preloaded_level_data):
+				yield progress * 0.8
+		else:
+			# Restarting after a death, the already loaded level is kept
+			self.level = level
+			self.level.reset(self.particle_manager, self.in_water_particle_manager, self.lighting_manager)
 		self.projectile_group = ProjectileGroup(self.level)
 
-		self.particle_manager.generate_chunked_colliders((*self.level.get_colliders(), *self.level.get_colliders(1)))
-		self.in_water_particle_manager.generate_chunked_colliders(self.level.get_colliders())
+		self.on_ground_collision_mask = CollisionLayer.GROUND | CollisionLayer.WATER
+		self.in_water_collision_mask = CollisionLayer.GROUND
+
+		self.particle_manager.generate_chunked_colliders(self.level.get_colliders(self.on_ground_collision_mask))
+		self.in_water_particle_manager.generate_chunked_colliders(self.level.get_colliders(self.in_water_collision_mask))
 
-		self.water_monster_group = WaterMonsterGroup()
+		# Monsters are only made once the player comes near them
+		self.water_monster_group = WaterMonsterGroup(self.create_water_monster)
 		for water_enemy in self.level.water_monster_data:
-			self.water_monster_group.add_water_monster(water_enemy[0], WaterMonster(water_enemy[1], self.level, self.in_water_particle_manager, self.projectile_group))
+			self.water_monster_group.add_spawn_record(water_enemy[0], water_enemy[1])
 		self.level.water_monsters = self.water_monster_group
+		yield 0.9
 
 		self.boss_active = False
 		self.boss_particle_manager = pygbase.ParticleManager(chunk_size=pygbase.Common.get_value("tile_size")[0])
-		self.boss_particle_manager.generate_chunked_colliders(self.level.get_colliders())
+		self.boss_particle_manager.generate_chunked_colliders(self.level.get_colliders(self.in_water_collision_mask))
 		self.heart_of_the_sea = HeartOfTheSeaBoss(self.level.heart_of_the_sea_pos, self.boss_particle_manager, self.in_water_particle_manager)
 		self.boss_bar = BossBar((20, 20), (800, 50), self.heart_of_the_sea.health)
 		self.is_win_transition = False
 
-		self.on_ground_particle_colliders = {tile_pos: tile.rect for tile_pos, tile in self.level.tiles[0].items()}
-		if 1 in self.level.tiles:
-			self.on_ground_particle_colliders.update({tile_pos: tile.rect for tile_pos, tile in self.level.tiles[1].items()})
-
-		self.in_water_particle_colliders = {tile_pos: tile.rect for tile_pos, tile in self.level.tiles[0].items()}
-
 		if self.level.get_player_spawn_pos()[1] > pygbase.Common.get_value("water_level"):
-			self.collision_particle_group = CollisionParticleGroup("boiling_water", self.in_water_particle_colliders)
+			self.collision_particle_group = CollisionParticleGroup("boiling_water", self.level.merged_collision_grid, self.in_water_collision_mask)
 		else:
-			self.collision_particle_group = CollisionParticleGroup("flamethrower", self.on_ground_particle_colliders)
+			self.collision_particle_group = CollisionParticleGroup("flamethrower", self.level.merged_collision_grid, self.on_ground_collision_mask)
 		self.flamethrower_particle_settings = pygbase.Common.get_particle_setting("flamethrower")
 		self.fire_particle_settings = pygbase.Common.get_particle_setting("fire")
 		self.smoke_particle_settings = pygbase.Common.get_particle_setting("smoke")
@@ -73,7 +108,61 @@ class Game(pygbase.GameState, name="game"):
 		self.player_hit_sound: pygame.mixer.Sound = pygbase.ResourceManager.get_resource("sound", "hitHurt")
 		self.win_sound: pygame.mixer.Sound = pygbase.ResourceManager.get_resource("sound", "win")
 
+		# Drawn between the last two steps, so movement stays smooth when the frame rate and step rate differ
+		self.fixed_step = FixedStep(pygbase.Common.get_value("sim_rate"))
+		self.render_interpolator = RenderInterpolator(self.camera)
+
+		yield 1
+
+	def create_water_monster(self, pos: tuple | pygame.Vector2) -> WaterMonster:
+		return WaterMonster(pos, self.level, self.in_water_particle_manager, self.projectile_group)
+
+	def get_interpolated_positions(self) -> tuple[list[pygame.Vector2], list[np.ndarray]]:
+		# Positions that things are drawn at, only monsters in range move
+		positions = [self.player.pos]
+		arrays = []
+
+		for projectile in self.projectile_group.projectiles:
+			positions.append(projectile.pos)
+
+		for water_monster in self.water_monster_group.active_monsters:
+			positions.append(water_monster.water_orb_average_pos)
+			arrays.append(water_monster.water_orb_group.positions)
+
+		return positions, arrays
+
+	def get_state_summary(self) -> dict:
+		return {
+			"player_pos": tuple(self.player.pos),
+			"is_swimming": self.player.is_swimming,
+			"boss_active": self.boss_active,
+			"particles": len(self.particle_manager.particles),
+			"in_water_particles": len(self.in_water_particle_manager.particles),
+			"boss_particles": len(self.boss_particle_manager.particles),
+			"collision_particles": self.collision_particle_group.num_particles,
+			"water_monsters": len(self.water_monster_group.water_monsters),
+			"water_monster_spawn_records": len(self.water_monster_group.spawn_records),
+			"active_water_monsters": len(self.water_monster_group.active_monsters),
+			"projectiles": len(self.projectile_group.projectiles)
+		}
+
 	def update(self, delta: float):
+		if pygbase.InputManager.get_key_just_pressed(pygame.K_F3):
+			self.timing_overlay.toggle()
+		self.timing_overlay.update(delta)
+
+		self.timings.new_frame()
+		if self.spike_profiler is not None:
+			self.spike_profiler.update(self.get_state_summary)
+
+		self.input_source.next_frame(delta)
+
+		# The simulation runs at a fixed rate, no matter the frame rate
+		for _ in range(self.fixed_step.add_time(delta)):
+			self.render_interpolator.store(*self.get_interpolated_positions())
+			self.fixed_update(self.fixed_step.delta)
+
+	def fixed_update(self, delta: float):
 		# Level
 		if self.level.update(delta, self.player.pos):
 			self.camera.shake_screen(0.3)
@@ -81,6 +170,7 @@ class Game(pygbase.GameState, name="game"):
 		focal_point = self.level.get_current_focal_point()
 
 		self.camera.tick(delta)
+		self.timings.lap("level")
 
 		# Particles
 		water_monster_colliders = [*self.water_monster_group.get_colliders(self.player.pos), *self.heart_of_the_sea.colliders]
@@ -88,7 +178,10 @@ class Game(pygbase.GameState, name="game"):
 		self.in_water_particle_manager.pass_dynamic_colliders(water_monster_colliders)
 		self.particle_manager.update(delta)
 		self.in_water_particle_manager.update(delta)
+		self.timings.lap("particles")
+
 		particle_collision_positions = self.collision_particle_group.update(delta, water_monster_colliders)
+		self.timings.lap("collision particles")
 
 		# Projectiles
 		hits = self.projectile_group.update(delta, [self.player.rect])
@@ -99,6 +192,7 @@ class Game(pygbase.GameState, name="game"):
 				self.camera.shake_screen(0.3)
 
 				self.player_hit_sound.play()
+		self.timings.lap("projectiles")
 
 		# Collision particles
 		particle_collision_circle_colliders = []
@@ -130,14 +224,17 @@ class Game(pygbase.GameState, name="game"):
 					self.in_water_particle_manager.add_particle(particle_collision_position + offset, self.water_vapour_particle_settings, initial_velocity=offset * random.uniform(4, 8))
 
 			particle_collision_circle_colliders.append(particle_collider)
+		self.timings.lap("collision particles")
 
 		# Monsters
 		set_monsters_to_update = set()
 		if focal_point is not None:
 			set_monsters_to_update = set(focal_point[2])
 		self.water_monster_group.update(delta, self.player.pos + (0, -10 if self.player.is_swimming else -80), particle_collision_circle_colliders, self.camera, set_monsters_to_update)
+		self.timings.lap("monsters")
 
 		self.player.update(delta)
+		self.timings.lap("player")
 
 		# Boss updates
 		if self.boss_active:
@@ -150,7 +247,7 @@ class Game(pygbase.GameState, name="game"):
 			if num_to_summon != 0:
 				for _ in range(num_to_summon):
 					offset = pygbase.utils.get_angled_vector(random.uniform(0, 360), random.uniform(0, 20))
-					self.water_monster_group.add_water_monster(-1, WaterMonster(self.heart_of_the_sea.pos + offset, self.level, self.in_water_particle_manager, self.projectile_group))
+					self.water_monster_group.add_water_monster(-1, self.create_water_monster(self.heart_of_the_sea.pos + offset))
 
 				self.camera.shake_screen(0.4)
 
@@ -167,6 +264,7 @@ class Game(pygbase.GameState, name="game"):
 			if self.player.pos.distance_to(self.heart_of_the_sea.pos) < 700:
 				self.boss_active = True
 		# self.boss_active = False
+		self.timings.lap("boss")
 
 		# Camera
 		if self.boss_active:
@@ -178,17 +276,19 @@ class Game(pygbase.GameState, name="game"):
 
 		if self.player.gun_water_to_land:
 			self.collision_particle_group.particle_settings = self.flamethrower_particle_settings
-			self.collision_particle_group.colliders = self.on_ground_particle_colliders
-			self.collision_particle_group.particles.clear()
+			self.collision_particle_group.collision_mask = self.on_ground_collision_mask
+			self.collision_particle_group.clear()
 		elif self.player.gun_land_to_water:
 			self.collision_particle_group.particle_settings = self.boiling_water_particle_settings
-			self.collision_particle_group.colliders = self.in_water_particle_colliders
-			self.collision_particle_group.particles.clear()
+			self.collision_particle_group.collision_mask = self.in_water_collision_mask
+			self.collision_particle_group.clear()
 
 		if not self.is_player_death_transition and not self.player.health.alive():
 			self.player.kill()
 			self.is_player_death_transition = True
-			self.set_next_state(pygbase.FadeTransition(self, Game(), 2.0, (0, 0, 0)))
+			self.set_next_state(pygbase.FadeTransition(self, Game(self.level), 2.0, (0, 0, 0)))
+
+		self.timings.lap("other")
 
 	# if pygbase.InputManager.get_key_pressed(pygame.K_p):
 	# if pygbase.InputManager.get_key_just_pressed(pygame.K_p):
@@ -199,21 +299,28 @@ class Game(pygbase.GameState, name="game"):
 	# 	self.projectile_group.add_projectile(GarbageProjectile(mouse_pos, throw_vec))
 
 	def draw(self, surface: pygame.Surface):
+		self.timings.restart()
+		self.render_interpolator.begin(self.fixed_step.get_alpha())
+
 		surface.fill((150, 180, 223))
 		self.outline_draw_surface.fill((0, 0, 0, 0))
 		for water_draw_surface in self.water_draw_surfaces.values():
 			water_draw_surface.fill((0, 0, 0, 0))
 
+		self.level.update_streaming(self.camera)
+
 		near_water_monsters = self.water_monster_group.get_monsters(self.player.pos, radius=1200)
 		self.level.draw(surface, self.camera, [self.heart_of_the_sea, self.player, *near_water_monsters], 0, exclude_layers={1})
 
 		self.projectile_group.draw(surface, self.camera)
+		self.timings.lap("world draw")
 
 		self.particle_manager.draw(surface, self.camera)
 		self.in_water_particle_manager.draw(surface, self.camera)
 		if self.boss_active:
 			self.boss_particle_manager.draw(surface, self.camera)
 		# self.collision_particle_group.draw(surface, self.camera)
+		self.timings.lap("particle draw")
 
 		for water_draw_surface in self.water_draw_surfaces.values():
 			water_draw_surface.fill((255, 255, 255, self.water_alpha), special_flags=pygame.BLEND_RGBA_MIN)
@@ -223,8 +330,10 @@ class Game(pygbase.GameState, name="game"):
 
 		if 1 in self.level.tiles:
 			self.level.single_layer_draw(surface, self.camera, 1)  # Water
+		self.timings.lap("water")
 
 		self.lighting_manager.draw(surface, self.camera)
+		self.timings.lap("lighting")
 
 		for water_monster in near_water_monsters:
 			water_monster.draw_ui(surface, self.camera)
@@ -234,3 +343,8 @@ class Game(pygbase.GameState, name="game"):
 		self.player_health_bar.draw(surface)
 		if self.boss_active:
 			self.boss_bar.draw(surface)
+		self.timings.lap("ui")
+
+		self.render_interpolator.end()
+
+		self.timing_overlay.draw(surface)
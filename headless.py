@@ -0,0 +1,135 @@
+import json
+import logging
+import pathlib
+import time
+
+import pygame
+import pygbase
+
+from game import Game
+from input_source import InputSource, ScriptedInput
+from replay import CANONICAL_REPLAYS, Replay, ReplayInput, get_replay_path
+from timing import FrameTimings
+
+HEADLESS_DELTA = 1 / 60
+MAX_TRANSITION_FRAMES = 600
+
+# Stand ins for canonical replays that haven't been recorded, started at the checkpoint nearest the part of the level the replay covers
+SCRIPTED_BENCHMARK_FRAMES = 1800
+SCRIPTED_BENCHMARK_CHECKPOINTS = {"surface_run": -1, "dive": 5, "focal_point_fight": 3, "boss_fight": 6}
+
+
+def get_default_script(num_frames: int, screen_size: tuple[int, int]) -> list[tuple[set[int], set[int], tuple[int, int]]]:
+	# Walks back and forth, jumping every so often, while firing in front of the player
+	frames = []
+	for frame in range(num_frames):
+		seconds = frame * HEADLESS_DELTA
+
+		keys = set()
+		if seconds % 8 < 5:
+			keys.add(pygame.K_d)
+			mouse_pos = (screen_size[0] * 3 // 4, screen_size[1] // 2)
+		else:
+			keys.add(pygame.K_a)
+			mouse_pos = (screen_size[0] // 4, screen_size[1] // 2)
+
+		if seconds % 2 < 0.3:
+			keys.add(pygame.K_w)
+
+		mouse_buttons = {0} if seconds % 3 < 2 else set()
+
+		frames.append((keys, mouse_buttons, mouse_pos))
+
+	return frames
+
+
+def step(state: pygbase.GameState, delta: float, surface: pygame.Surface, draw: bool) -> pygbase.GameState:
+	state.update(delta)
+	if draw:
+		state.draw(surface)
+
+	# Follow state changes, like the transition on player death
+	return state.next_state
+
+
+def run_headless(num_frames: int, input_source: InputSource, draw: bool = True) -> pygbase.GameState:
+	pygbase.Common.set_value("input_source", input_source)
+
+	timings: FrameTimings = pygbase.Common.get_value("frame_timings")
+	timings.reset()
+
+	state: pygbase.GameState = Game()
+	surface = pygame.Surface(pygbase.Common.get_value("screen_size"))
+
+	start_time = time.perf_counter()
+	for _ in range(num_frames):
+		state = step(state, HEADLESS_DELTA, surface, draw)
+
+	elapsed = time.perf_counter() - start_time
+	timings.end_frame()
+
+	logging.info(f"Simulated {num_frames} frames in {elapsed:.2f}s ({num_frames / max(elapsed, 1e-9):.0f} frames per second)\n{timings.get_report()}")
+
+	return state
+
+
+def run_replay(replay: Replay, draw: bool = True) -> FrameTimings:
+	pygbase.Common.set_value("seed", replay.seed)
+	pygbase.Common.set_value("start_checkpoint", replay.start_checkpoint)
+
+	replay_input = ReplayInput(replay)
+	pygbase.Common.set_value("input_source", replay_input)
+
+	timings: FrameTimings = pygbase.Common.get_value("frame_timings")
+	timings.reset()
+
+	state: pygbase.GameState = Game()
+	surface = pygame.Surface(pygbase.Common.get_value("screen_size"))
+
+	transition_frames = 0
+	while not replay_input.done():
+		if isinstance(state, Game):
+			delta = replay_input.peek_delta()
+			transition_frames = 0
+		else:
+			# Only frames of the game are recorded, so anything else, like a transition, runs at a fixed delta
+			delta = HEADLESS_DELTA
+			transition_frames += 1
+
+			# Left the game for good, like after winning
+			if transition_frames > MAX_TRANSITION_FRAMES:
+				break
+
+		state = step(state, delta, surface, draw)
+
+	timings.end_frame()
+
+	return timings
+
+
+def run_scripted(num_frames: int, start_checkpoint: int, draw: bool = True) -> FrameTimings:
+	# Same seed and script every run, so it can be compared between commits like a replay
+	pygbase.Common.set_value("seed", 0)
+	pygbase.Common.set_value("start_checkpoint", start_checkpoint)
+
+	run_headless(num_frames, ScriptedInput(get_default_script(num_frames, pygbase.Common.get_value("screen_size"))), draw)
+
+	return pygbase.Common.get_value("frame_timings")
+
+
+def run_benchmark(names: tuple[str, ...] = CANONICAL_REPLAYS, draw: bool = True, output_dir: pathlib.Path | None = None):
+	for name in names:
+		replay_path = get_replay_path(name)
+		if replay_path.is_file():
+			timings = run_replay(Replay.load(replay_path), draw)
+		else:
+			logging.warning(f"Missing replay `{name}`, using the default script instead, record it with `-record {name}`")
+			timings = run_scripted(SCRIPTED_BENCHMARK_FRAMES, SCRIPTED_BENCHMARK_CHECKPOINTS.get(name, -1), draw)
+
+		logging.info(f"Benchmark `{name}`:\n{timings.get_report()}")
+
+		# Results can be compared between commits with profile_compare.py
+		if output_dir is not None:
+			output_dir.mkdir(parents=True, exist_ok=True)
+			with open(output_dir / f"{name}.json", "w") as result_file:
+				result_file.write(json.dumps(timings.get_summary(), indent=2))
@@ -0,0 +1,52 @@
+import pygame
+import pygbase
+
+
+class InputSource:
+	def next_frame(self, delta: float):
+		pass
+
+	def get_key_pressed(self, key: int) -> bool:
+		raise NotImplementedError
+
+	def get_mouse_pressed(self, button: int) -> bool:
+		raise NotImplementedError
+
+	def get_mouse_world_pos(self, camera: pygbase.Camera) -> pygame.Vector2:
+		raise NotImplementedError
+
+
+class LiveInput(InputSource):
+	def get_key_pressed(self, key: int) -> bool:
+		return pygbase.InputManager.get_key_pressed(key)
+
+	def get_mouse_pressed(self, button: int) -> bool:
+		return pygbase.InputManager.get_mouse_pressed(button)
+
+	def get_mouse_world_pos(self, camera: pygbase.Camera) -> pygame.Vector2:
+		return camera.screen_to_world(pygame.mouse.get_pos())
+
+
+class ScriptedInput(InputSource):
+	def __init__(self, frames: list[tuple[set[int], set[int], tuple[int, int]]]):
+		# [(pressed keys, pressed mouse buttons, mouse screen pos)], the last frame is held once the script runs out
+		self.frames = frames
+
+		self.frame_index = -1
+		self.keys: set[int] = set()
+		self.mouse_buttons: set[int] = set()
+		self.mouse_pos = (0, 0)
+
+	def next_frame(self, delta: float):
+		if self.frame_index < len(self.frames) - 1:
+			self.frame_index += 1
+			self.keys, self.mouse_buttons, self.mouse_pos = self.frames[self.frame_index]
+
+	def get_key_pressed(self, key: int) -> bool:
+		return key in self.keys
+
+	def get_mouse_pressed(self, button: int) -> bool:
+		return button in self.mouse_buttons
+
+	def get_mouse_world_pos(self, camera: pygbase.Camera) -> pygame.Vector2:
+		return camera.screen_to_world(self.mouse_pos)
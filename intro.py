@@ -2,13 +2,19 @@ import pygbase
 import pygame
 
 from files import FONT_PATH
-from game import Game
+from level import Level
+from loading import Loading
+from preloader import Preloader
 
 
 class Intro(pygbase.GameState, name="intro"):
 	def __init__(self):
 		super().__init__()
 
+		# The level is read while the intro is shown, so starting the game doesn't have to
+		self.level_preloader = Preloader(Level.load_level_data, Level.get_file_path())
+		self.is_starting = False
+
 		self.ui = pygbase.UIManager()
 		self.ui.add_element(
 			pygbase.TextElement(
@@ -118,7 +124,12 @@ class Intro(pygbase.GameState, name="intro"):
 		self.ui.update(delta)
 
 		if pygbase.InputManager.get_key_just_pressed(pygame.K_SPACE):
-			self.set_next_state(pygbase.FadeTransition(self, Game(), 4.0, (0, 0, 0)))
+			self.is_starting = True
+
+		# Waits on the preload without blocking, the rest is loaded behind the loading screen
+		if self.is_starting and self.level_preloader.done():
+			self.is_starting = False
+			self.set_next_state(pygbase.FadeTransition(self, Loading(self.level_preloader.get()), 4.0, (0, 0, 0)))
 
 	def draw(self, surface: pygame.Surface):
 		surface.fill("black")
@@ -2,14 +2,20 @@ import json
 import logging
 import pathlib
 import random
-from typing import TYPE_CHECKING
+import struct
+from typing import TYPE_CHECKING, Generator
 
+import numpy as np
 import pygame
 import pygame.geometry
 import pygbase
 
-from files import ASSET_DIR
+from chunk_cache import TileChunkCache
+from collision import CollisionGrid, CollisionLayer, merge_rects
+from files import ASSET_DIR, CACHE_DIR, CURRENT_DIR
+from level_file import LevelData, get_content_hash
 from tile import Tile
+from tile_streamer import TileStreamer
 
 if TYPE_CHECKING:
 	from water_monster import WaterMonsterGroup
@@ -17,8 +23,9 @@ if TYPE_CHECKING:
 
 class Level:
 	LEVEL_NAME = "level"
+	TILES_PER_LOAD_STEP = 200
 
-	def __init__(self, particle_manager: pygbase.ParticleManager, in_water_particle_manager: pygbase.ParticleManager, lighting_manager: pygbase.LightingManager) -> None:
+	def __init__(self, particle_manager: pygbase.ParticleManager, in_water_particle_manager: pygbase.ParticleManager, lighting_manager: pygbase.LightingManager, use_chunk_cache: bool = False, start_checkpoint: int | None = None, preloaded_data: tuple[LevelData, pathlib.Path] | None = None, time_sliced: bool = False, stream_tiles: bool = False) -> None:
 		self.particle_manager = particle_manager
 		self.in_water_particle_manager = in_water_particle_manager
 		self.checkpoint_particles = pygbase.Common.get_particle_setting("checkpoint")
@@ -27,6 +34,16 @@ class Level:
 		self.tile_size = pygbase.Common.get_value("tile_size")
 		self.tiles: dict[int, dict[tuple[int, int], Tile]] = {0: {}}
 
+		# {tile_layer: collision_layer}
+		self.collision_layer_key: dict[int, CollisionLayer] = {
+			0: CollisionLayer.GROUND,
+			1: CollisionLayer.WATER
+		}
+
+		# Touching tile colliders joined into larger rects, shared by everything that collides with the level
+		self.merged_collision_grid = CollisionGrid(self.tile_size)
+		self.merged_colliders_stale = True
+
 		self.parallax_amount = 0.1
 		self.screen_size = pygbase.Common.get_value("screen_size")
 
@@ -42,18 +59,42 @@ class Level:
 			-4: -3
 		}
 
+		# Bakes the static tile layers into chunk surfaces as they come into view
+		self.tile_chunk_cache: TileChunkCache | None = TileChunkCache() if use_chunk_cache else None
+
+		# Only makes the tiles around the camera, the rest stay packed in the level data. Made once the level data is loaded
+		self.stream_tiles = stream_tiles
+		self.tile_streamer: TileStreamer | None = None
+
 		# Validate layer keys
 		for layer in self.tiles.keys():
 			if layer not in self.parallax_layer_key:
 				raise ValueError(f"Missing parallax key for tile layer {layer}")
 
+		self.water_monsters: WaterMonsterGroup | None = None
+
+		self.checkpoint_sound: pygame.mixer.Sound = pygbase.ResourceManager.get_resource("sound", "checkpoint")
+
+		self.lighting_manager = lighting_manager
+
+		# Loading can instead be spread over several frames by stepping through `load_steps`
+		if not time_sliced:
+			for _ in self.load_steps(start_checkpoint, preloaded_data):
+				pass
+
+	def load_steps(self, start_checkpoint: int | None = None, preloaded_data: tuple[LevelData, pathlib.Path] | None = None) -> Generator[float, None, None]:
+		# Yields how far through loading it is, from 0 to 1
 		(
 			self.level_player_spawn_pos,
 			self.water_monster_data,
 			self.heart_of_the_sea_pos,
 			self.focal_point_data,
 			self.checkpoint_data
-		) = self.load()
+		) = yield from self.load(preloaded_data)
+
+		if self.merged_colliders_stale:
+			self.merge_colliders()
+		yield 0.95
 
 		# {id: (pos, strength, radius, monster_ids)}
 		self.current_focal_point = -1
@@ -62,21 +103,40 @@ class Level:
 		# {id: (collider, focal_id)}
 		self.checkpoints: dict[int, pygame.geometry.Circle] = {checkpoint_id: pygame.geometry.Circle(pos, 80) for checkpoint_id, pos in self.checkpoint_data}
 		self.checkpoint_lights = {}
-
-		self.lighting_manager = lighting_manager
 		self.regen_checkpoints()
 
+		# With a start checkpoint, progress is only kept in memory so the progress file is never touched
+		self.use_progress_file = start_checkpoint is None
+
 		self.current_player_checkpoint_id = -1
-		self.load_progress()
+		if self.use_progress_file:
+			self.load_progress()
+		elif start_checkpoint in self.checkpoints:
+			self.current_player_checkpoint_id = start_checkpoint
 
 		if self.current_player_checkpoint_id != -1:
 			self.checkpoint_lights[self.current_player_checkpoint_id].set_brightness(1.4)
 
 		self.player_on_checkpoint = False
+		yield 1
 
-		self.water_monsters: WaterMonsterGroup | None = None
+	def reset(self, particle_manager: pygbase.ParticleManager, in_water_particle_manager: pygbase.ParticleManager, lighting_manager: pygbase.LightingManager):
+		# Reused by the next game after a death, so only what the game changes is reset, keeping the tiles, colliders and chunk cache
+		self.particle_manager = particle_manager
+		self.in_water_particle_manager = in_water_particle_manager
 
-		self.checkpoint_sound: pygame.mixer.Sound = pygbase.ResourceManager.get_resource("sound", "checkpoint")
+		# The old lights stay with the old lighting manager, which is still drawn during the transition
+		self.checkpoint_lights = {}
+		self.lighting_manager = lighting_manager
+		self.regen_checkpoints()
+
+		if self.current_player_checkpoint_id != -1:
+			self.checkpoint_lights[self.current_player_checkpoint_id].set_brightness(1.4)
+
+		self.current_focal_point = -1
+		self.player_on_checkpoint = False
+
+		self.water_monsters = None
 
 	def regen_checkpoints(self):
 		for light in self.checkpoint_lights.values():
@@ -124,36 +184,105 @@ class Level:
 		with open(path, "x") as level_file:
 			level_file.write(json.dumps(init_data))
 
-	def load(self) -> tuple[tuple, list[tuple[int, tuple[int, int]]], tuple, list[tuple[int, tuple[float, float], float, float, list]], list[tuple[int, tuple[float, float]]]]:
-		file_path = ASSET_DIR / "levels" / f"{self.LEVEL_NAME}.json"
+	def load(self, preloaded_data: tuple[LevelData, pathlib.Path] | None = None) -> Generator[float, None, tuple[tuple, list[tuple[int, tuple[int, int]]], tuple, list[tuple[int, tuple[float, float], float, float, list]], list[tuple[int, tuple[float, float]]]]]:
+		file_path = self.get_file_path()
 
 		if not file_path.is_file():
 			self.init_save_file(file_path)
 
 			return (0, 0), [], (10000, 0), [], []
 		else:
-			with open(file_path, "r") as level_file:
-				level_data = json.load(level_file)
-
-			player_spawn_pos = level_data["player_spawn_pos"] if "player_spawn_pos" in level_data else (0, 0)
-			enemy_spawn_locations = level_data["water_enemy_spawn_locations"] if "water_enemy_spawn_locations" in level_data else []
-			heart_of_the_sea_pos = level_data["heart_of_the_sea_pos"] if "heart_of_the_sea_pos" in level_data else [10000, 0]
-			focal_points = level_data["focal_points"] if "focal_points" in level_data else []
-			checkpoints = level_data["checkpoints"] if "checkpoints" in level_data else []
+			# Already read and decoded on a worker thread
+			level_data, compiled_path = preloaded_data if preloaded_data is not None else self.load_level_data(file_path)
+			yield 0.1
+
+			player_spawn_pos = level_data.metadata.get("player_spawn_pos", (0, 0))
+			enemy_spawn_locations = level_data.metadata.get("water_enemy_spawn_locations", [])
+			heart_of_the_sea_pos = level_data.metadata.get("heart_of_the_sea_pos", [10000, 0])
+			focal_points = level_data.metadata.get("focal_points", [])
+			checkpoints = level_data.metadata.get("checkpoints", [])
+
+			if self.stream_tiles:
+				self.tile_streamer = TileStreamer(level_data, self.tile_chunk_cache.chunk_size if self.tile_chunk_cache is not None else 8)
+				for layer_index in level_data.layers.keys():
+					self.tiles.setdefault(layer_index, {})
+
+				# Tiles are only needed up front to merge their colliders, then they are released as the camera moves
+				if len(level_data.colliders) != 0:
+					self.set_merged_colliders(level_data.colliders)
+					yield 0.9
+
+					return player_spawn_pos, enemy_spawn_locations, heart_of_the_sea_pos, focal_points, checkpoints
+
+				self.tile_streamer.active_chunks.update(self.tile_streamer.chunk_ranges.keys())
+
+			# Making tiles (and scaling their images) is most of the loading
+			num_tiles = max(sum(len(layer) for layer in level_data.layers.values()), 1)
+			num_loaded = 0
+
+			for layer_index in level_data.layers.keys():
+				for tile_pos, (from_sheet, name, index) in level_data.get_tiles(layer_index):
+					if not from_sheet:
+						self.add_tile(tile_pos, layer_index, name)
+					else:
+						self.add_sheet_tile(tile_pos, layer_index, name, index)
 
-			for layer_index, layer in level_data["tiles"].items():
-				for str_tile_pos, tile in layer.items():
-					split_str_tile_pos = str_tile_pos.split(",")
+					num_loaded += 1
+					if num_loaded % self.TILES_PER_LOAD_STEP == 0:
+						yield 0.1 + 0.8 * num_loaded / num_tiles
 
-					tile_pos = int(split_str_tile_pos[0]), int(split_str_tile_pos[1])
+			if len(level_data.colliders) != 0:
+				self.set_merged_colliders(level_data.colliders)
+			else:
+				self.merge_colliders()
 
-					if not tile["from_sheet"]:
-						self.add_tile(tile_pos, int(layer_index), tile["tile_name"])
-					else:
-						self.add_sheet_tile(tile_pos, int(layer_index), tile["sheet_name"], tile["index"])
+				level_data.colliders = self.get_merged_colliders()
+				self.save_compiled(level_data, compiled_path)
+			yield 0.9
 
 			return player_spawn_pos, enemy_spawn_locations, heart_of_the_sea_pos, focal_points, checkpoints
 
+	@classmethod
+	def get_file_path(cls) -> pathlib.Path:
+		return ASSET_DIR / "levels" / f"{cls.LEVEL_NAME}.json"
+
+	@classmethod
+	def get_compiled_path(cls, file_path: pathlib.Path) -> pathlib.Path:
+		# Keyed by everything the compiled level is built from, so it is rebuilt whenever any of it changes.
+		# The merged colliders also depend on the tile collider rules, the merging and the tile size
+		content_hash = get_content_hash(
+			[file_path, ASSET_DIR / "tiles" / "config.json", ASSET_DIR / "tile_sheets" / "config.json", CURRENT_DIR / "tile.py", CURRENT_DIR / "collision.py"],
+			[pygbase.Common.get_value("tile_size")]
+		)
+		return CACHE_DIR / f"{cls.LEVEL_NAME}_{content_hash}.level"
+
+	@classmethod
+	def load_level_data(cls, file_path: pathlib.Path) -> tuple[LevelData, pathlib.Path]:
+		# The json is what gets edited and shared, the compiled level is built from it to load quickly
+		compiled_path = cls.get_compiled_path(file_path)
+		if compiled_path.is_file():
+			try:
+				return LevelData.load(compiled_path), compiled_path
+			except (ValueError, KeyError, struct.error, OSError) as e:
+				# A bad cache file is rebuilt like an outdated one, rather than failing every start until it is deleted
+				logging.warning(f"Recompiling level: {e}")
+
+		with open(file_path, "r") as level_file:
+			return LevelData.from_json(json.load(level_file)), compiled_path
+
+	@classmethod
+	def save_compiled(cls, level_data: LevelData, compiled_path: pathlib.Path):
+		try:
+			compiled_path.parent.mkdir(parents=True, exist_ok=True)
+
+			# Compiled versions of older level files are never used again, nor are files left by interrupted saves
+			for old_path in [*compiled_path.parent.glob(f"{cls.LEVEL_NAME}_*.level"), *compiled_path.parent.glob(f"{cls.LEVEL_NAME}_*.tmp")]:
+				old_path.unlink(missing_ok=True)
+
+			level_data.save(compiled_path)
+		except OSError as e:
+			logging.warning(f"Could not save compiled level: {e}")
+
 	def save(self):
 		logging.info("Saving level")
 
@@ -206,23 +335,68 @@ class Level:
 		else:
 			return 0
 
-	def get_colliders(self, layer: int = 0) -> tuple[pygame.Rect]:
-		if layer in self.tiles:
-			return tuple(tile.rect for tile in self.tiles[layer].values())  # NoQA
-		else:
-			return ()  # NoQA
+	def get_colliders(self, mask: CollisionLayer = CollisionLayer.GROUND) -> list[pygame.Rect]:
+		return self.merged_collision_grid.get_all_colliders(mask)
+
+	def merge_colliders(self):
+		# Rebuilt in place, as the grid is held onto by everything colliding with the level
+		self.merged_collision_grid.clear()
+
+		for layer, collision_layer in self.collision_layer_key.items():
+			if layer in self.tiles:
+				for rect in merge_rects([tile.rect for tile in self.tiles[layer].values()]):
+					self.merged_collision_grid.add_collider(rect, collision_layer)
+
+		self.merged_colliders_stale = False
+
+	def get_merged_colliders(self) -> dict[int, np.ndarray]:
+		# {collision layer: (n, 4) array of rects}, to be stored in the compiled level
+		return {int(collision_layer): np.array([tuple(rect) for rect in self.merged_collision_grid.colliders[collision_layer]], dtype=np.int32).reshape(-1, 4) for collision_layer in self.collision_layer_key.values()}
+
+	def set_merged_colliders(self, colliders: dict[int, np.ndarray]):
+		self.merged_collision_grid.clear()
+
+		for collision_layer, rects in colliders.items():
+			for rect in rects.tolist():
+				self.merged_collision_grid.add_collider(pygame.Rect(rect), CollisionLayer(collision_layer))
+
+		self.merged_colliders_stale = False
 
 	def get_tile_pos(self, pos: tuple):
 		return int(pos[0] // self.tile_size[0]), int(pos[1] // self.tile_size[1])
 
+	def _set_tile(self, tile_pos: tuple[int, int], layer: int, tile: Tile):
+		layer_tiles = self.tiles.setdefault(layer, {})
+
+		if layer in self.collision_layer_key:
+			self.merged_colliders_stale = True
+
+		if self.tile_chunk_cache is not None:
+			self.tile_chunk_cache.invalidate(layer, tile_pos)
+
+		layer_tiles[tile_pos] = tile
+
+	def _make_tile(self, tile_pos: tuple[int, int], layer: int, from_sheet: bool, name: str, index: int) -> Tile:
+		tile = Tile(tile_pos, self.tile_size, self.get_parallax_layer(layer), self.parallax_amount)
+		if not from_sheet:
+			return tile.set_image(name)
+		else:
+			return tile.set_sprite_sheet(name, index)
+
 	def add_tile(self, tile_pos: tuple[int, int], layer: int, tile_name):
-		self.tiles.setdefault(layer, {})[tile_pos] = Tile(tile_pos, self.tile_size, self.get_parallax_layer(layer), self.parallax_amount).set_image(tile_name)
+		self._set_tile(tile_pos, layer, self._make_tile(tile_pos, layer, False, tile_name, -1))
 
 	def add_sheet_tile(self, tile_pos: tuple[int, int], layer: int, sheet_name: str, index: int):
-		self.tiles.setdefault(layer, {})[tile_pos] = Tile(tile_pos, self.tile_size, self.get_parallax_layer(layer), self.parallax_amount).set_sprite_sheet(sheet_name, index)
+		self._set_tile(tile_pos, layer, self._make_tile(tile_pos, layer, True, sheet_name, index))
 
 	def remove_tile(self, tile_pos: tuple[int, int], layer: int):
 		if layer in self.tiles and tile_pos in self.tiles[layer]:
+			if layer in self.collision_layer_key:
+				self.merged_colliders_stale = True
+
+			if self.tile_chunk_cache is not None:
+				self.tile_chunk_cache.invalidate(layer, tile_pos)
+
 			del self.tiles[layer][tile_pos]
 
 			if len(self.tiles[layer].keys()) == 0:
@@ -251,6 +425,10 @@ class Level:
 				self.current_player_checkpoint_id = -1
 
 	def save_progress(self):
+		if not self.use_progress_file:
+			pygbase.Common.set_value("start_checkpoint", self.current_player_checkpoint_id)
+			return
+
 		progress_file_path = ASSET_DIR / "levels" / f"{self.LEVEL_NAME}_progress.json"
 
 		if not progress_file_path.is_file():
@@ -270,6 +448,9 @@ class Level:
 					progress_file.write(json.dumps(original_data))
 
 	def update(self, delta: float, player_pos: pygame.Vector2):
+		if self.merged_colliders_stale:
+			self.merge_colliders()
+
 		player_checkpoint_collision = False
 		collided_checkpoint_id = -1
 		collided_checkpoint_pos = None
@@ -318,54 +499,123 @@ class Level:
 
 		return False
 
+	def get_parallax_factor(self, layer: int) -> float:
+		return max(1 + self.get_parallax_layer(layer) * self.parallax_amount, 0)
+
+	def _get_parallax_pos(self, camera: pygbase.Camera, pos: tuple, parallax_factor: float) -> tuple[float, float]:
+		screen_pos = camera.world_to_screen(pos)
+		return (screen_pos[0] - self.screen_size[0] / 2) * parallax_factor + self.screen_size[0] / 2, (screen_pos[1] - self.screen_size[1] / 2) * parallax_factor + self.screen_size[1] / 2
+
+	def _get_visible_tile_range(self, camera: pygbase.Camera, layer_index: int) -> tuple[tuple[int, int], tuple[int, int]]:
+		parallax_key = self.get_parallax_layer(layer_index)
+
+		x_parallax_amount = self.screen_size[0] * parallax_key * self.parallax_amount
+		y_parallax_amount = self.screen_size[1] * parallax_key * self.parallax_amount
+
+		tile_size = (64 * (1 + parallax_key * self.parallax_amount), 64 * (1 + parallax_key * self.parallax_amount))
+
+		top_left = self.get_tile_pos(camera.screen_to_world((x_parallax_amount, y_parallax_amount)))
+		bottom_right = self.get_tile_pos(camera.screen_to_world((self.screen_size[0] - x_parallax_amount + tile_size[0], self.screen_size[1] - y_parallax_amount + tile_size[1])))
+
+		return top_left, bottom_right
+
+	def _draw_tiles(self, surface: pygame.Surface, camera: pygbase.Camera, layer: dict[tuple[int, int], Tile], top_left: tuple[int, int], bottom_right: tuple[int, int], parallax_factor: float):
+		# Tiles sit on a grid, so every parallax position comes from the screen position of one corner
+		start_x, start_y = self._get_parallax_pos(camera, (top_left[0] * self.tile_size[0], top_left[1] * self.tile_size[1]), parallax_factor)
+		x_step = self.tile_size[0] * parallax_factor
+		y_step = self.tile_size[1] * parallax_factor
+
+		cols = range(top_left[0], bottom_right[0])
+		x_positions = [start_x + x_step * index for index in range(len(cols))]
+
+		blit_sequence = []
+		for row_index, row in enumerate(range(top_left[1], bottom_right[1])):
+			y = start_y + y_step * row_index
+
+			for col, x in zip(cols, x_positions):
+				tile = layer.get((col, row))
+				if tile is not None:
+					blit_sequence.append((tile.image, (x, y)))
+
+		surface.fblits(blit_sequence)
+
+	def _draw_layer(self, surface: pygame.Surface, camera: pygbase.Camera, layer_index: int):
+		layer = self.tiles[layer_index]
+		top_left, bottom_right = self._get_visible_tile_range(camera, layer_index)
+
+		parallax_factor = self.get_parallax_factor(layer_index)
+
+		if self.tile_chunk_cache is None:
+			self._draw_tiles(surface, camera, layer, top_left, bottom_right, parallax_factor)
+			return
+
+		chunk_size = self.tile_chunk_cache.chunk_size
+		tile_step = self.tile_size[0] * parallax_factor
+
+		top_left_chunk = self.tile_chunk_cache.get_chunk_pos(top_left)
+		bottom_right_chunk = self.tile_chunk_cache.get_chunk_pos((bottom_right[0] - 1, bottom_right[1] - 1))
+
+		for chunk_row in range(top_left_chunk[1], bottom_right_chunk[1] + 1):
+			for chunk_col in range(top_left_chunk[0], bottom_right_chunk[0] + 1):
+				chunk_pos = (chunk_col, chunk_row)
+
+				if (layer_index, chunk_pos) in self.tile_chunk_cache or self.tile_chunk_cache.can_bake():
+					chunk = self.tile_chunk_cache.get_chunk(layer_index, chunk_pos, layer, tile_step)
+					if chunk is not None:
+						surface.blit(chunk, self._get_parallax_pos(camera, (chunk_col * chunk_size * self.tile_size[0], chunk_row * chunk_size * self.tile_size[1]), parallax_factor))
+				else:  # Out of bakes for this frame, draw the visible part of the chunk tile by tile
+					self._draw_tiles(
+						surface, camera, layer,
+						(max(chunk_col * chunk_size, top_left[0]), max(chunk_row * chunk_size, top_left[1])),
+						(min((chunk_col + 1) * chunk_size, bottom_right[0]), min((chunk_row + 1) * chunk_size, bottom_right[1])),
+						parallax_factor
+					)
+
+	def update_streaming(self, camera: pygbase.Camera):
+		# Called before drawing, with the camera it is drawn with
+		if self.tile_streamer is None:
+			return
+
+		visible_ranges = {}
+		for layer_index in self.tiles.keys():
+			top_left, bottom_right = self._get_visible_tile_range(camera, layer_index)
+			visible_ranges[layer_index] = (top_left, (bottom_right[0] - 1, bottom_right[1] - 1))
+
+		to_activate, to_deactivate = self.tile_streamer.update(visible_ranges)
+
+		# Streamed tiles are the same as the level data, so neither the colliders nor baked chunks change
+		for key in to_deactivate:
+			layer = self.tiles[key[0]]
+			for tile_pos, _ in self.tile_streamer.get_chunk_tiles(key):
+				layer.pop(tile_pos, None)
+
+		for key in to_activate:
+			layer_index = key[0]
+			layer = self.tiles[layer_index]
+			for tile_pos, (from_sheet, name, index) in self.tile_streamer.get_chunk_tiles(key):
+				layer[tile_pos] = self._make_tile(tile_pos, layer_index, from_sheet, name, index)
+
 	def draw(self, surface: pygame.Surface, camera: pygbase.Camera, entities: list, entity_layer: int, exclude_layers: set[int] | None = None):
 		for focal_point in self.focal_points.values():
 			pygbase.DebugDisplay.draw_circle(camera.world_to_screen(focal_point[0]), focal_point[2], "yellow")
 
 		exclude_layers = {} if exclude_layers is None else exclude_layers
 
-		for layer_index, layer in sorted(self.tiles.items(), key=lambda e: e[0]):
+		if self.tile_chunk_cache is not None:
+			self.tile_chunk_cache.new_frame()
+
+		for layer_index in sorted(self.tiles.keys()):
 			if layer_index in exclude_layers:
 				continue
 
-			parallax_key = self.get_parallax_layer(layer_index)
-
-			x_parallax_amount = self.screen_size[0] * parallax_key * self.parallax_amount
-			y_parallax_amount = self.screen_size[1] * parallax_key * self.parallax_amount
-
-			tile_size = (64 * (1 + parallax_key * self.parallax_amount), 64 * (1 + parallax_key * self.parallax_amount))
-
-			top_left = self.get_tile_pos(camera.screen_to_world((x_parallax_amount, y_parallax_amount)))
-			bottom_right = self.get_tile_pos(camera.screen_to_world((self.screen_size[0] - x_parallax_amount + tile_size[0], self.screen_size[1] - y_parallax_amount + tile_size[1])))
-
-			for row in range(top_left[1], bottom_right[1]):
-				for col in range(top_left[0], bottom_right[0]):
-					tile = layer.get((col, row))
-					if tile is not None:
-						tile.draw(surface, camera)
-			# print(layer_index, col, row)
+			self._draw_layer(surface, camera, layer_index)
 
 			if layer_index == entity_layer:
 				for entities in entities:
 					entities.draw(surface, camera)
 
 	def single_layer_draw(self, surface: pygame.Surface, camera: pygbase.Camera, layer_index: int):
-		layer = self.tiles[layer_index]
-		parallax_key = self.get_parallax_layer(layer_index)
-
-		x_parallax_amount = self.screen_size[0] * parallax_key * self.parallax_amount
-		y_parallax_amount = self.screen_size[1] * parallax_key * self.parallax_amount
-
-		tile_size = (64 * (1 + parallax_key * self.parallax_amount), 64 * (1 + parallax_key * self.parallax_amount))
-
-		top_left = self.get_tile_pos(camera.screen_to_world((x_parallax_amount, y_parallax_amount)))
-		bottom_right = self.get_tile_pos(camera.screen_to_world((self.screen_size[0] - x_parallax_amount + tile_size[0], self.screen_size[1] - y_parallax_amount + tile_size[1])))
-
-		for row in range(top_left[1], bottom_right[1]):
-			for col in range(top_left[0], bottom_right[0]):
-				tile = layer.get((col, row))
-				if tile is not None:
-					tile.draw(surface, camera)
+		self._draw_layer(surface, camera, layer_index)
 
 	def editor_draw(self, surface: pygame.Surface, camera: pygbase.Camera, current_focus: int = -1):
 		for layer_index, layer in sorted(self.tiles.items(), key=lambda e: e[0]):
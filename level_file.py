@@ -0,0 +1,167 @@
+import hashlib
+import json
+import mmap
+import os
+import pathlib
+import struct
+import tempfile
+
+import numpy as np
+
+LEVEL_MAGIC = b"BPLV"
+LEVEL_VERSION = 2
+
+# Magic, version, length of the json metadata, number of layers
+HEADER_FORMAT = struct.Struct("<4sBII")
+
+# Layer index, number of tiles (or colliders)
+LAYER_FORMAT = struct.Struct("<iI")
+
+# Number of collision layers
+COLLIDERS_FORMAT = struct.Struct("<I")
+
+# Tile position and index into the palette, packed so a layer is read straight into an array
+TILE_DTYPE = np.dtype([("x", "<i4"), ("y", "<i4"), ("palette_index", "<u2")])
+
+# Merged collider x, y, width and height
+COLLIDER_DTYPE = np.dtype("<i4")
+
+# Everything but the tiles, kept as json in the header as it is small
+METADATA_KEYS = ("player_spawn_pos", "water_enemy_spawn_locations", "heart_of_the_sea_pos", "focal_points", "checkpoints")
+
+
+class LevelData:
+	def __init__(self, palette: list[tuple[bool, str, int]], layers: dict[int, np.ndarray], metadata: dict, colliders: dict[int, np.ndarray] | None = None):
+		# [(from_sheet, tile or sheet name, sheet index)], shared by the tiles of every layer
+		self.palette = palette
+
+		# {layer: tiles}
+		self.layers = layers
+		self.metadata = metadata
+
+		# {collision layer: (n, 4) array of merged collider rects}, filled in once the level has been merged
+		self.colliders: dict[int, np.ndarray] = colliders if colliders is not None else {}
+
+	@classmethod
+	def from_json(cls, level_data: dict) -> "LevelData":
+		palette = []
+		palette_indices: dict[tuple[bool, str, int], int] = {}
+
+		layers = {}
+		for layer_index, layer in level_data["tiles"].items():
+			tiles = np.empty(len(layer), dtype=TILE_DTYPE)
+
+			for tile_index, (str_tile_pos, tile) in enumerate(layer.items()):
+				split_str_tile_pos = str_tile_pos.split(",")
+
+				if not tile["from_sheet"]:
+					entry = (False, tile["tile_name"], -1)
+				else:
+					entry = (True, tile["sheet_name"], tile["index"])
+
+				palette_index = palette_indices.get(entry)
+				if palette_index is None:
+					palette_index = palette_indices[entry] = len(palette)
+					palette.append(entry)
+
+				tiles[tile_index] = (int(split_str_tile_pos[0]), int(split_str_tile_pos[1]), palette_index)
+
+			layers[int(layer_index)] = tiles
+
+		return cls(palette, layers, {key: level_data[key] for key in METADATA_KEYS if key in level_data})
+
+	def get_tiles(self, layer_index: int) -> list[tuple[tuple[int, int], tuple[bool, str, int]]]:
+		# [(tile_pos, palette entry)]
+		return [((x, y), self.palette[palette_index]) for x, y, palette_index in self.layers[layer_index].tolist()]
+
+	@classmethod
+	def load(cls, path: pathlib.Path) -> "LevelData":
+		with open(path, "rb") as level_file, mmap.mmap(level_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+			def read_struct(struct_format: struct.Struct, offset: int) -> tuple:
+				if offset + struct_format.size > len(data):
+					raise ValueError(f"{path} is truncated")
+				return struct_format.unpack_from(data, offset)
+
+			def read_array(dtype: np.dtype, count: int, offset: int) -> np.ndarray:
+				if offset + count * dtype.itemsize > len(data):
+					raise ValueError(f"{path} is truncated")
+				# Copied, as the map is closed after loading
+				return np.frombuffer(data, dtype=dtype, count=count, offset=offset).copy()
+
+			magic, version, metadata_length, num_layers = read_struct(HEADER_FORMAT, 0)
+			if magic != LEVEL_MAGIC:
+				raise ValueError(f"{path} is not a level file")
+			if version != LEVEL_VERSION:
+				raise ValueError(f"{path} is level version {version}, expected {LEVEL_VERSION}")
+
+			offset = HEADER_FORMAT.size
+			if offset + metadata_length > len(data):
+				raise ValueError(f"{path} is truncated")
+			# Malformed json raises a ValueError too
+			metadata = json.loads(data[offset:offset + metadata_length])
+			offset += metadata_length
+
+			layers = {}
+			for _ in range(num_layers):
+				layer_index, num_tiles = read_struct(LAYER_FORMAT, offset)
+				offset += LAYER_FORMAT.size
+
+				layers[layer_index] = read_array(TILE_DTYPE, num_tiles, offset)
+				offset += num_tiles * TILE_DTYPE.itemsize
+
+			colliders = {}
+			num_collision_layers, = read_struct(COLLIDERS_FORMAT, offset)
+			offset += COLLIDERS_FORMAT.size
+			for _ in range(num_collision_layers):
+				collision_layer, num_colliders = read_struct(LAYER_FORMAT, offset)
+				offset += LAYER_FORMAT.size
+
+				colliders[collision_layer] = read_array(COLLIDER_DTYPE, num_colliders * 4, offset).reshape(-1, 4)
+				offset += num_colliders * 4 * COLLIDER_DTYPE.itemsize
+
+			if offset != len(data):
+				raise ValueError(f"{path} has {len(data) - offset} bytes past the end of the level")
+
+		if not isinstance(metadata, dict) or not isinstance(metadata.get("palette"), list) or not all(isinstance(entry, list) and len(entry) == 3 for entry in metadata["palette"]):
+			raise ValueError(f"{path} has no palette")
+
+		palette = [tuple(entry) for entry in metadata.pop("palette")]
+		for layer in layers.values():
+			if len(layer) != 0 and int(layer["palette_index"].max()) >= len(palette):
+				raise ValueError(f"{path} has tiles outside of the palette")
+
+		return cls(palette, layers, metadata, colliders)
+
+	def save(self, path: pathlib.Path):
+		metadata = json.dumps({"palette": self.palette, **self.metadata}).encode()
+
+		# Written next to the final path and moved into place, so an interrupted save never leaves a partial level behind
+		file_descriptor, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+		try:
+			with os.fdopen(file_descriptor, "wb") as level_file:
+				level_file.write(HEADER_FORMAT.pack(LEVEL_MAGIC, LEVEL_VERSION, len(metadata), len(self.layers)))
+				level_file.write(metadata)
+
+				for layer_index, layer in self.layers.items():
+					level_file.write(LAYER_FORMAT.pack(layer_index, len(layer)))
+					level_file.write(layer.astype(TILE_DTYPE, copy=False).tobytes())
+
+				level_file.write(COLLIDERS_FORMAT.pack(len(self.colliders)))
+				for collision_layer, colliders in self.colliders.items():
+					level_file.write(LAYER_FORMAT.pack(collision_layer, len(colliders)))
+					level_file.write(colliders.astype(COLLIDER_DTYPE, copy=False).tobytes())
+
+			os.replace(temp_path, path)
+		except BaseException:
+			pathlib.Path(temp_path).unlink(missing_ok=True)
+			raise
+
+def get_content_hash(paths: list[pathlib.Path], settings: list | None = None) -> str:
+	# Changes with the contents of any of the files, the settings, or the level format
+	content_hash = hashlib.sha256(bytes([LEVEL_VERSION]))
+	for path in paths:
+		if path.is_file():
+			content_hash.update(path.read_bytes())
+		content_hash.update(b"\0")
+	content_hash.update(json.dumps(settings if settings is not None else []).encode())
+	return content_hash.hexdigest()[:16]
@@ -0,0 +1,51 @@
+import pathlib
+import time
+
+import pygame
+import pygbase
+
+from files import FONT_PATH
+from game import Game
+from level_file import LevelData
+
+
+class Loading(pygbase.GameState, name="loading"):
+	def __init__(self, preloaded_level_data: tuple[LevelData, pathlib.Path] | None = None, frame_budget: float = 1 / 120):
+		super().__init__()
+
+		# Time spent loading each frame, so the window keeps responding
+		self.frame_budget = frame_budget
+
+		self.game = Game(time_sliced=True)
+		self.loader = self.game.load_steps(preloaded_level_data=preloaded_level_data)
+		self.progress = 0
+		self.is_loaded = False
+
+		self.font = pygame.font.Font(FONT_PATH, 20)
+		self.screen_size = pygbase.Common.get_value("screen_size")
+
+	def update(self, delta: float):
+		if self.is_loaded:
+			return
+
+		start_time = time.perf_counter()
+		for progress in self.loader:
+			self.progress = progress
+
+			if time.perf_counter() - start_time > self.frame_budget:
+				break
+		else:
+			self.is_loaded = True
+			self.set_next_state(pygbase.FadeTransition(self, self.game, 1.0, (0, 0, 0)))
+
+	def draw(self, surface: pygame.Surface):
+		surface.fill("black")
+
+		bar_rect = pygame.Rect(0, 0, self.screen_size[0] // 2, 16)
+		bar_rect.center = (self.screen_size[0] // 2, self.screen_size[1] // 2)
+
+		pygame.draw.rect(surface, "dark gray", bar_rect, width=2)
+		pygame.draw.rect(surface, "white", (bar_rect.x, bar_rect.y, bar_rect.width * self.progress, bar_rect.height))
+
+		text = self.font.render("Loading", True, "white")
+		surface.blit(text, text.get_rect(midbottom=(bar_rect.centerx, bar_rect.top - 10)))
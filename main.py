@@ -1,6 +1,8 @@
 import cProfile
 import json
 import logging
+import os
+import pathlib
 import sys
 
 import pygame
@@ -9,16 +11,47 @@ import pygbase
 from editor import Editor
 from files import ASSET_DIR
 from game import Game
+from headless import get_default_script, run_benchmark, run_headless, run_replay
+from input_source import LiveInput, ScriptedInput
 from intro import Intro
+from loading import Loading
+from replay import InputRecorder, Replay, get_replay_path
+from spike_profiler import SpikeProfiler
+from timing import FrameTimings, TimingOverlay
 
 DEBUG = False
 DO_PROFILE = False
+PROFILE_SPIKES = False  # Also turned on with `-spikes`
+
+
+def get_arg_value(cl_args: list[str], name: str, default):
+	if name in cl_args:
+		return type(default)(cl_args[cl_args.index(name) + 1])
+	return default
+
+
+def get_player_progress() -> int:
+	progress_file_path = ASSET_DIR / "levels" / f"level_progress.json"
+
+	if progress_file_path.is_file():
+		with open(progress_file_path, "r") as file:
+			data = json.load(file)
+
+		return data["player_checkpoint"]
+	return -1
+
 
 if __name__ == '__main__':
 	cl_args = sys.argv
 
-	if "-game" in cl_args and "-editor" in cl_args:
-		raise ValueError("`-game` and `-editor` are mutually exclusive")
+	if sum(flag in cl_args for flag in ("-game", "-editor", "-headless", "-record", "-replay", "-benchmark")) > 1:
+		raise ValueError("`-game`, `-editor`, `-headless`, `-record`, `-replay` and `-benchmark` are mutually exclusive")
+
+	is_headless = "-headless" in cl_args or "-replay" in cl_args or "-benchmark" in cl_args
+	if is_headless:
+		# No window or sound device
+		os.environ["SDL_VIDEODRIVER"] = "dummy"
+		os.environ["SDL_AUDIODRIVER"] = "dummy"
 
 	pygbase.init((850, 650), logging_level=logging.INFO, max_light_radius=300)
 
@@ -142,6 +175,28 @@ if __name__ == '__main__':
 
 	pygbase.Common.set_value("water_level", 20)
 
+	# Simulation steps per second, can be lowered on slow machines
+	pygbase.Common.set_value("sim_rate", get_arg_value(cl_args, "-sim-rate", 60))
+
+	pygbase.Common.set_value("input_source", LiveInput())
+	frame_timings = FrameTimings()
+	pygbase.Common.set_value("frame_timings", frame_timings)
+	pygbase.Common.set_value("timing_overlay", TimingOverlay(frame_timings))  # Toggled with F3
+
+	# Profiles the frames after any frame over budget, can't run alongside the whole session profile
+	spike_profiler = None
+	if (PROFILE_SPIKES or "-spikes" in cl_args) and not DO_PROFILE:
+		spike_profiler = SpikeProfiler(
+			frame_timings,
+			budget=get_arg_value(cl_args, "-spike-budget", 33.3) / 1000,
+			capture_frames=get_arg_value(cl_args, "-spike-frames", 30)
+		)
+	pygbase.Common.set_value("spike_profiler", spike_profiler)
+
+	# A seed and start checkpoint make the game play out the same every run, without touching the progress file
+	pygbase.Common.set_value("seed", None)
+	pygbase.Common.set_value("start_checkpoint", None)
+
 	water_draw_surfaces: dict[str | tuple, pygame.Surface] = {}
 	for color in water_monster_colors:
 		water_draw_surfaces[color] = pygame.Surface(pygbase.Common.get_value("screen_size"), flags=pygame.SRCALPHA)
@@ -166,24 +221,43 @@ if __name__ == '__main__':
 
 		profiler.dump_stats("stats.prof")
 	else:
-		if "-game" in cl_args:  # Skip menu
-			pygbase.App(Game).run()
+		if "-headless" in cl_args:
+			pygbase.Common.set_value("seed", get_arg_value(cl_args, "-seed", 0))
+			pygbase.Common.set_value("start_checkpoint", get_arg_value(cl_args, "-checkpoint", -1))
+
+			num_frames = get_arg_value(cl_args, "-frames", 3600)
+			run_headless(num_frames, ScriptedInput(get_default_script(num_frames, pygbase.Common.get_value("screen_size"))))
+		elif "-record" in cl_args:
+			replay = Replay(get_arg_value(cl_args, "-seed", 0), get_arg_value(cl_args, "-checkpoint", get_player_progress()))
+			recorder = InputRecorder(replay)
+
+			pygbase.Common.set_value("seed", replay.seed)
+			pygbase.Common.set_value("start_checkpoint", replay.start_checkpoint)
+			pygbase.Common.set_value("input_source", recorder)
+
+			pygbase.App(Game, title="Boiling Point").run()
+
+			recorder.stop()
+			replay.save(get_replay_path(get_arg_value(cl_args, "-record", "")))
+		elif "-replay" in cl_args:
+			replay_name = get_arg_value(cl_args, "-replay", "")
+			logging.info(f"Replay `{replay_name}`:\n{run_replay(Replay.load(get_replay_path(replay_name))).get_report()}")
+		elif "-benchmark" in cl_args:
+			output_dir = get_arg_value(cl_args, "-benchmark-out", "")
+			run_benchmark(output_dir=pathlib.Path(output_dir) if output_dir != "" else None)
+		elif "-game" in cl_args:  # Skip menu
+			pygbase.App(Loading).run()
 		elif "-editor" in cl_args:
 			pygbase.App(Editor).run()
 		else:
 			start_state = Intro
 
-			progress_file_path = ASSET_DIR / "levels" / f"level_progress.json"
-
-			if progress_file_path.is_file():
-				with open(progress_file_path, "r") as file:
-					data = json.load(file)
-
-				player_progress = data["player_checkpoint"]
-
-				if player_progress != -1:
-					start_state = Game
+			if get_player_progress() != -1:
+				start_state = Loading
 
 			pygbase.App(start_state, title="Boiling Point").run()
 
+	if spike_profiler is not None:
+		spike_profiler.stop()
+
 	pygbase.quit()
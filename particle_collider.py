@@ -1,115 +1,126 @@
 import random
 
+import numpy as np
 import pygame
 import pygbase
 
+from collision import CollisionGrid, CollisionLayer
 
-class CollisionParticle:
-	def __init__(self, pos: tuple | pygame.Vector2, settings: dict, initial_velocity=(0, 0)):
-		self.pos = pygame.Vector2(pos)
 
-		self.size: float = random.uniform(
-			settings[pygbase.common.ParticleOptions.SIZE][0],
-			settings[pygbase.common.ParticleOptions.SIZE][1]
-		)
-		self.size_decay: float = random.uniform(
-			settings[pygbase.common.ParticleOptions.SIZE_DECAY][0],
-			settings[pygbase.common.ParticleOptions.SIZE_DECAY][1]
-		)
+def get_points_in_rects(points: np.ndarray, rects: list[pygame.Rect]) -> np.ndarray:
+	if len(rects) == 0 or len(points) == 0:
+		return np.zeros(len(points), dtype=bool)
 
-		self.colour = random.choice(settings[pygbase.common.ParticleOptions.COLOUR])
+	# Columns of left, top, right, bottom
+	rect_bounds = np.array([(rect.left, rect.top, rect.right, rect.bottom) for rect in rects], dtype=np.float32)
 
-		self.velocity: pygame.Vector2 = pygame.Vector2(initial_velocity)
-		self.velocity_decay: float = random.uniform(
-			settings[pygbase.common.ParticleOptions.VELOCITY_DECAY][0],
-			settings[pygbase.common.ParticleOptions.VELOCITY_DECAY][1]
-		)
+	# Rect.collidepoint truncates float points, so do the same
+	x = np.trunc(points[:, 0])[:, np.newaxis]
+	y = np.trunc(points[:, 1])[:, np.newaxis]
 
-		self.gravity: tuple = settings[pygbase.common.ParticleOptions.GRAVITY]
-		self.effector: bool = settings[pygbase.common.ParticleOptions.EFFECTOR]
+	return ((rect_bounds[:, 0] <= x) & (x < rect_bounds[:, 2]) & (rect_bounds[:, 1] <= y) & (y < rect_bounds[:, 3])).any(axis=1)
 
-		self.bounce: tuple = settings[pygbase.common.ParticleOptions.BOUNCE]
 
-		self.is_alive = True
+class CollisionParticleGroup:
+	def __init__(self, particle_type: str, collision_grid: CollisionGrid, collision_mask: CollisionLayer, capacity: int = 64):
+		self.particle_settings = pygbase.Common.get_particle_setting(particle_type)
 
-	def alive(self):
-		return self.size > 0.2 and self.is_alive
+		# Particles are stored as arrays, only the first `num_particles` entries are alive
+		self.num_particles = 0
+		self.positions = np.zeros((capacity, 2), dtype=np.float32)
+		self.velocities = np.zeros((capacity, 2), dtype=np.float32)
+		self.sizes = np.zeros(capacity, dtype=np.float32)
+		self.size_decays = np.zeros(capacity, dtype=np.float32)
+		self.velocity_decays = np.zeros(capacity, dtype=np.float32)
 
-	def update(self, delta: float, colliders: list[pygame.Rect]):
-		collide_pos = None
+		self.collision_grid = collision_grid
+		self.collision_mask = collision_mask
 
-		self.velocity.x += self.gravity[0]
-		self.velocity.x -= self.velocity.x * delta * self.velocity_decay
+	def _grow(self):
+		capacity = len(self.sizes) * 2
 
-		self.pos.x += self.velocity.x * delta
+		self.positions = np.resize(self.positions, (capacity, 2))
+		self.velocities = np.resize(self.velocities, (capacity, 2))
+		self.sizes = np.resize(self.sizes, capacity)
+		self.size_decays = np.resize(self.size_decays, capacity)
+		self.velocity_decays = np.resize(self.velocity_decays, capacity)
 
-		for collider in colliders:
-			if collider.collidepoint(self.pos):
-				# self.pos.x -= self.velocity.x * delta
-				# self.velocity.x *= -self.bounce[0]
+	def add_particle(self, pos: tuple | pygame.Vector2, initial_velocity=(0, 0)):
+		if self.num_particles == len(self.sizes):
+			self._grow()
 
-				collide_pos = self.pos
+		index = self.num_particles
+		self.num_particles += 1
 
-				self.is_alive = False
+		self.positions[index] = pos
+		self.velocities[index] = initial_velocity
+		self.sizes[index] = random.uniform(*self.particle_settings[pygbase.common.ParticleOptions.SIZE])
+		self.size_decays[index] = random.uniform(*self.particle_settings[pygbase.common.ParticleOptions.SIZE_DECAY])
+		self.velocity_decays[index] = random.uniform(*self.particle_settings[pygbase.common.ParticleOptions.VELOCITY_DECAY])
 
-		self.velocity.y += self.gravity[1]
-		self.velocity.y -= self.velocity.y * delta * self.velocity_decay
+	def clear(self):
+		self.num_particles = 0
 
-		self.pos.y += self.velocity.y * delta
+	def _get_level_colliders(self, prev_positions: np.ndarray, positions: np.ndarray) -> list[pygame.Rect]:
+		# Every level collider around the area the particles moved through this frame
+		min_pos = np.minimum(prev_positions.min(axis=0), positions.min(axis=0))
+		max_pos = np.maximum(prev_positions.max(axis=0), positions.max(axis=0))
 
-		for collider in colliders:
-			if collider.collidepoint(self.pos):
-				# self.pos.y -= self.velocity.y * delta
-				# self.velocity.y *= -self.bounce[1]
+		area = pygame.Rect(int(min_pos[0]) - 1, int(min_pos[1]) - 1, int(max_pos[0] - min_pos[0]) + 3, int(max_pos[1] - min_pos[1]) + 3)
+		return self.collision_grid.get_colliders(area, self.collision_mask)
 
-				collide_pos = self.pos
+	def update(self, delta: float, dynamic_colliders: list[pygame.Rect]):
+		collision_positions: list[tuple[pygame.Vector2, str]] = []
 
-				self.is_alive = False
+		if self.num_particles == 0:
+			return collision_positions
 
-		self.size -= delta * self.size_decay
+		num_particles = self.num_particles
+		positions = self.positions[:num_particles]
+		velocities = self.velocities[:num_particles]
+		velocity_decays = self.velocity_decays[:num_particles]
 
-		return collide_pos
+		gravity = self.particle_settings[pygbase.common.ParticleOptions.GRAVITY]
+		prev_positions = positions.copy()
 
+		# X movement
+		velocities[:, 0] += gravity[0]
+		velocities[:, 0] -= velocities[:, 0] * delta * velocity_decays
+		positions[:, 0] += velocities[:, 0] * delta
 
-class CollisionParticleGroup:
-	def __init__(self, particle_type: str, colliders: dict[tuple[int, int], pygame.Rect]):
-		self.particle_settings = pygbase.Common.get_particle_setting(particle_type)
-
-		self.particles: list[CollisionParticle] = []
+		# Y movement
+		velocities[:, 1] += gravity[1]
+		velocities[:, 1] -= velocities[:, 1] * delta * velocity_decays
+		positions[:, 1] += velocities[:, 1] * delta
 
-		self.colliders = colliders
-		self.tile_size = pygbase.Common.get_value("tile_size")
+		colliders = [*dynamic_colliders, *self._get_level_colliders(prev_positions, positions)]
 
-	def add_particle(self, pos: tuple | pygame.Vector2, initial_velocity=(0, 0)):
-		self.particles.append(CollisionParticle(pos, self.particle_settings, initial_velocity))
+		# Each axis is tested after it moves, so the point after only the x movement is tested too
+		x_moved_positions = prev_positions
+		x_moved_positions[:, 0] = positions[:, 0]
 
-	def update(self, delta: float, dynamic_colliders: list[pygame.Rect]):
-		collision_positions: list[tuple[pygame.Vector2, str]] = []
+		collided = get_points_in_rects(x_moved_positions, colliders) | get_points_in_rects(positions, colliders)
 
-		for particle in self.particles:
-			tile_pos = int(particle.pos.x // self.tile_size[0]), int(particle.pos.y // self.tile_size[1])
-			top_left = (tile_pos[0] - 1, tile_pos[1] - 1)
-			bottom_right = (tile_pos[0] + 1, tile_pos[1] + 1)
+		self.sizes[:num_particles] -= delta * self.size_decays[:num_particles]
 
-			surrounding_colliders = []
-			for row in range(top_left[1], bottom_right[1]):
-				for col in range(top_left[0], bottom_right[0]):
-					rect = self.colliders.get((col, row))
-					if rect is not None:
-						surrounding_colliders.append(rect)
+		particle_name = self.particle_settings[pygbase.common.ParticleOptions.NAME]
+		for index in np.flatnonzero(collided):
+			collision_positions.append((pygame.Vector2(positions[index].tolist()), particle_name))
 
-			collision_pos = particle.update(delta, [*dynamic_colliders, *surrounding_colliders])
-			if collision_pos is not None:
-				collision_positions.append((collision_pos, self.particle_settings[pygbase.common.ParticleOptions.NAME]))
+		# Move the alive particles to the front
+		alive = np.flatnonzero((self.sizes[:num_particles] > 0.2) & ~collided)
+		self.num_particles = len(alive)
 
-		self.particles[:] = [particle for particle in self.particles if particle.alive()]
+		if self.num_particles != num_particles:
+			for array in (self.positions, self.velocities, self.sizes, self.size_decays, self.velocity_decays):
+				array[:self.num_particles] = array[alive]
 
 		return collision_positions
 
 	def draw(self, surface: pygame.Surface, camera: pygbase.Camera):
-		for particle in self.particles:
-			pygame.draw.circle(surface, "blue", camera.world_to_screen(particle.pos), particle.size)
+		for pos, size in zip(self.positions[:self.num_particles].tolist(), self.sizes[:self.num_particles].tolist()):
+			pygame.draw.circle(surface, "blue", camera.world_to_screen(pos), size)
 
 	def debug_draw(self, camera: pygbase.Camera):
-		for particle in self.particles:
-			pygbase.DebugDisplay.draw_circle(camera.world_to_screen(particle.pos), particle.size, "blue", 0)
+		for pos, size in zip(self.positions[:self.num_particles].tolist(), self.sizes[:self.num_particles].tolist()):
+			pygbase.DebugDisplay.draw_circle(camera.world_to_screen(pos), size, "blue", 0)
@@ -5,6 +5,7 @@ import pygame.geometry
 import pygbase
 
 from health import Health
+from input_source import InputSource
 from level import Level
 from particle_collider import CollisionParticleGroup
 from temperature import Temperature
@@ -23,6 +24,7 @@ class Player:
 	) -> None:
 		self.screen_size = pygbase.Common.get_value("screen_size")
 
+		self.input_source: InputSource = pygbase.Common.get_value("input_source")
 		self.input = pygame.Vector2()
 
 		self.gravity = pygbase.Common.get_value("gravity")
@@ -105,7 +107,7 @@ class Player:
 
 		self.collision_particle_timer = pygbase.Timer(0.1, True, True)
 
-		self.level_colliders = self.level.get_colliders()
+		self.collision_grid = self.level.merged_collision_grid
 
 		self.thermometer_offset_ground = (0, -self.ground_rect.height - 20)
 		self.thermometer_offset_water = (0, -self.water_rect.height - 20)
@@ -144,6 +146,22 @@ class Player:
 
 		self.alive = False
 
+	def sweep_movement(self, movement: float, axis: int) -> tuple[float, pygame.Rect | None]:
+		# Movement up to the first collider along it, so a fast move can't skip past thin ones, and the collider stopped at
+		time_of_impact, _, collider = self.collision_grid.sweep(self.rect, (movement, 0) if axis == 0 else (0, movement))
+		if collider is None:
+			return movement, None
+
+		if axis == 0:
+			# Colliders low enough to step up onto don't stop the movement
+			edge_x = collider.left if movement > 0 else collider.right - 1
+			if not (self.collision_grid.collidepoint((edge_x, self.rect.bottom + self.step_offset)) or self.collision_grid.collidepoint((edge_x, self.rect.top))):
+				self.pos.y = collider.top
+				return movement, None
+
+		# Ends touching the collider, never further than the movement itself
+		return movement * time_of_impact, collider
+
 	def ground_movement(self, delta):
 		is_water_animation = self.animation.current_state == "swim"
 
@@ -176,22 +194,22 @@ class Player:
 		self.velocity.x += self.acceleration.x * delta
 		self.velocity.x = pygame.math.clamp(self.velocity.x, -self.max_speed_x, self.max_speed_x)
 
-		self.pos.x += self.velocity.x * delta + 0.5 * self.acceleration.x * (delta ** 2)
+		prev_rect = self.rect.copy()
+		x_movement, x_collider = self.sweep_movement(self.velocity.x * delta + 0.5 * self.acceleration.x * (delta ** 2), 0)
+		self.pos.x += x_movement
+		if x_collider is not None:
+			self.velocity.x = 0
 
 		self.rect.midbottom = self.pos
 
-		for rect in self.level_colliders:
+		for rect in self.collision_grid.get_colliders(self.rect.union(prev_rect)):
 			if self.rect.colliderect(rect):
 				if self.velocity.x > 0:
 					if rect.collidepoint(self.rect.bottomright + pygame.Vector2(0, self.step_offset)):
 						self.pos.x = rect.left - self.rect.width / 2
 						self.velocity.x = 0
 					else:  # Is a step
-						is_step = True
-						for step_rect in self.level_colliders:
-							if step_rect.collidepoint(self.rect.bottomright + pygame.Vector2(0, self.step_offset)) or step_rect.collidepoint(self.rect.topright):
-								is_step = False
-								break
+						is_step = not (self.collision_grid.collidepoint(self.rect.bottomright + pygame.Vector2(0, self.step_offset)) or self.collision_grid.collidepoint(self.rect.topright))
 
 						if is_step:
 							self.pos.y = rect.top
@@ -203,11 +221,7 @@ class Player:
 						self.pos.x = rect.right + self.rect.width / 2
 						self.velocity.x = 0
 					else:  # Is a step
-						is_step = True
-						for step_rect in self.level_colliders:
-							if step_rect.collidepoint(self.rect.bottomleft + pygame.Vector2(0, self.step_offset)) or step_rect.collidepoint(self.rect.topleft):
-								is_step = False
-								break
+						is_step = not (self.collision_grid.collidepoint(self.rect.bottomleft + pygame.Vector2(0, self.step_offset)) or self.collision_grid.collidepoint(self.rect.topleft))
 
 						if is_step:
 							self.pos.y = rect.top
@@ -237,12 +251,18 @@ class Player:
 		self.velocity.y += self.acceleration.y * delta
 		self.velocity.y = pygame.math.clamp(self.velocity.y, -self.max_speed_y * 2, self.max_speed_y)
 
-		self.pos.y += self.velocity.y * delta + 0.5 * self.acceleration.y * (delta ** 2)
+		prev_rect = self.rect.copy()
+		y_movement, y_collider = self.sweep_movement(self.velocity.y * delta + 0.5 * self.acceleration.y * (delta ** 2), 1)
+		self.pos.y += y_movement
 		self.rect.midbottom = self.pos
 
 		prev_on_ground = self.on_ground
 		self.on_ground = False
-		for rect in self.level_colliders:
+		if y_collider is not None:
+			self.on_ground = self.velocity.y > 0
+			self.velocity.y = 0
+
+		for rect in self.collision_grid.get_colliders(self.rect.union(prev_rect)):
 			if self.rect.colliderect(rect):
 				if self.velocity.y > 0:
 					self.pos.y = rect.top
@@ -286,21 +306,21 @@ class Player:
 
 		# self.velocity.x = pygame.math.clamp(self.velocity.x, -self.max_water_speed_x, self.max_water_speed_x)
 
-		self.pos.x += self.velocity.x * delta + 0.5 * self.acceleration.x * (delta ** 2)
+		prev_rect = self.rect.copy()
+		x_movement, x_collider = self.sweep_movement(self.velocity.x * delta + 0.5 * self.acceleration.x * (delta ** 2), 0)
+		self.pos.x += x_movement
+		if x_collider is not None:
+			self.velocity.x = 0
 		self.rect.midbottom = self.pos
 
-		for rect in self.level_colliders:
+		for rect in self.collision_grid.get_colliders(self.rect.union(prev_rect)):
 			if self.rect.colliderect(rect):
 				if self.velocity.x > 0:
 					if rect.collidepoint(self.rect.bottomright + pygame.Vector2(0, self.step_offset)):
 						self.pos.x = rect.left - self.rect.width / 2
 						self.velocity.x = 0
 					else:  # Is a step
-						is_step = True
-						for step_rect in self.level_colliders:
-							if step_rect.collidepoint(self.rect.bottomright + pygame.Vector2(0, self.step_offset)) or step_rect.collidepoint(self.rect.topright):
-								is_step = False
-								break
+						is_step = not (self.collision_grid.collidepoint(self.rect.bottomright + pygame.Vector2(0, self.step_offset)) or self.collision_grid.collidepoint(self.rect.topright))
 
 						if is_step:
 							self.pos.y = rect.top
@@ -312,11 +332,7 @@ class Player:
 						self.pos.x = rect.right + self.rect.width / 2
 						self.velocity.x = 0
 					else:  # Is a step
-						is_step = True
-						for step_rect in self.level_colliders:
-							if step_rect.collidepoint(self.rect.bottomleft + pygame.Vector2(0, self.step_offset)) or step_rect.collidepoint(self.rect.topleft):
-								is_step = False
-								break
+						is_step = not (self.collision_grid.collidepoint(self.rect.bottomleft + pygame.Vector2(0, self.step_offset)) or self.collision_grid.collidepoint(self.rect.topleft))
 
 						if is_step:
 							self.pos.y = rect.top
@@ -342,10 +358,14 @@ class Player:
 		self.velocity.y += self.acceleration.y * delta
 		self.velocity.y = pygame.math.clamp(self.velocity.y, -self.max_water_speed_y, self.max_water_speed_y)
 
-		self.pos.y += self.velocity.y * delta + 0.5 * self.acceleration.y * (delta ** 2)
+		prev_rect = self.rect.copy()
+		y_movement, y_collider = self.sweep_movement(self.velocity.y * delta + 0.5 * self.acceleration.y * (delta ** 2), 1)
+		self.pos.y += y_movement
 		self.rect.midbottom = self.pos
+		if y_collider is not None:
+			self.velocity.y = 0
 
-		for rect in self.level_colliders:
+		for rect in self.collision_grid.get_colliders(self.rect.union(prev_rect)):
 			if self.rect.colliderect(rect):
 				if self.velocity.y > 0:
 					self.pos.y = rect.top
@@ -368,7 +388,7 @@ class Player:
 
 		self.collision_particle_timer.tick(delta)
 
-		mouse_world_pos = self.camera.screen_to_world(pygame.mouse.get_pos())
+		mouse_world_pos = self.input_source.get_mouse_world_pos(self.camera)
 		angle_to_mouse = -pygbase.utils.get_angle_to(self.pos + self.fire_gun_offset, mouse_world_pos)
 
 		self.animation.update(delta)
@@ -385,8 +405,8 @@ class Player:
 		self.fall_timer.tick(delta)
 
 		if self.alive:
-			self.input.x = pygbase.InputManager.get_key_pressed(pygame.K_d) - pygbase.InputManager.get_key_pressed(pygame.K_a)
-			self.input.y = pygbase.InputManager.get_key_pressed(pygame.K_s) - pygbase.InputManager.get_key_pressed(pygame.K_w)
+			self.input.x = self.input_source.get_key_pressed(pygame.K_d) - self.input_source.get_key_pressed(pygame.K_a)
+			self.input.y = self.input_source.get_key_pressed(pygame.K_s) - self.input_source.get_key_pressed(pygame.K_w)
 		else:
 			self.input.x = 0
 			self.input.y = 0
@@ -417,14 +437,7 @@ class Player:
 			elif self.input.x == 0 and self.animation.current_state != "idle" and abs(self.velocity.x) < 2:
 				self.animation.switch_state("idle")
 		else:
-			will_collide = False
-
-			for collider in self.level_colliders:
-				if self.water_rect.colliderect(collider):
-					will_collide = True
-					break
-
-			if not will_collide:
+			if not self.collision_grid.colliderect(self.water_rect):
 				self.animation.switch_state("swim")
 
 			self.water_movement(delta)
@@ -477,7 +490,7 @@ class Player:
 			self.can_fire = True
 			self.gun_tip_fire_spawner.particle_settings = self.fire_particle_settings
 
-		if self.alive and pygbase.InputManager.get_mouse_pressed(0) and self.can_fire:
+		if self.alive and self.input_source.get_mouse_pressed(0) and self.can_fire:
 			if not self.flame_sound_playing:
 				self.flamethrower_start_sound.play()
 				self.flame_sound_start_timer.start()
@@ -545,7 +558,7 @@ class Player:
 	def draw(self, surface: pygame.Surface, camera: pygbase.Camera):
 		self.animation.draw_at_pos(surface, self.pos, camera, flip=(self.flip_x, False), draw_pos="midbottom")
 
-		mouse_world_pos = self.camera.screen_to_world(pygame.mouse.get_pos())
+		mouse_world_pos = self.input_source.get_mouse_world_pos(self.camera)
 		angle_to_mouse = pygbase.utils.get_angle_to(self.pos + self.fire_gun_offset, mouse_world_pos)
 
 		flip_y = 90 < angle_to_mouse % 360 < 270
@@ -0,0 +1,30 @@
+import logging
+import threading
+
+
+class Preloader:
+	def __init__(self, load, *args):
+		# Runs `load` on a worker thread, it must not touch pygame surfaces, those are left for the main thread
+		self.result = None
+		self.error: Exception | None = None
+
+		self.thread = threading.Thread(target=self._run, args=(load, args), daemon=True)
+		self.thread.start()
+
+	def _run(self, load, args: tuple):
+		try:
+			self.result = load(*args)
+		except Exception as e:
+			self.error = e
+
+	def done(self) -> bool:
+		return not self.thread.is_alive()
+
+	def get(self):
+		# Waits for the load to finish, None if it failed so the caller can load normally instead
+		self.thread.join()
+
+		if self.error is not None:
+			logging.warning(f"Preloading failed: {self.error}")
+			return None
+		return self.result
@@ -0,0 +1,186 @@
+import argparse
+import json
+import pathlib
+import pstats
+import sys
+
+# {(module, function): (calls, tottime, cumtime)}
+ProfileData = dict[tuple[str, str], tuple[float, float, float]]
+
+
+def get_module_name(file_name: str) -> str:
+	# Profiles come from different machines, so only the part of the path that is the same everywhere is kept
+	if file_name == "~":
+		return "{built-in}"
+
+	path = pathlib.PurePath(file_name)
+	if "site-packages" in path.parts:
+		return "/".join(path.parts[path.parts.index("site-packages") + 1:])
+	return path.name
+
+
+def load_profile(path: pathlib.Path) -> ProfileData:
+	# Line numbers move between commits, so functions are matched by module and name, and same named functions are summed
+	profile: ProfileData = {}
+	for (file_name, _, function_name), (_, num_calls, tottime, cumtime, _) in pstats.Stats(str(path)).stats.items():
+		key = (get_module_name(file_name), function_name)
+
+		calls, total_tottime, total_cumtime = profile.get(key, (0, 0, 0))
+		profile[key] = (calls + num_calls, total_tottime + tottime, total_cumtime + cumtime)
+
+	return profile
+
+
+def get_frame_count(profile: ProfileData) -> int:
+	# Game.update runs once a frame
+	calls = profile.get(("game.py", "update"), (0, 0, 0))[0]
+	if calls == 0:
+		raise ValueError("Profile has no calls to game.py update, pass the frame count in manually")
+	return calls
+
+
+def normalize(profile: ProfileData, num_frames: int) -> ProfileData:
+	# Per frame, with times in ms
+	return {key: (calls / num_frames, tottime * 1000 / num_frames, cumtime * 1000 / num_frames) for key, (calls, tottime, cumtime) in profile.items()}
+
+
+def get_module_totals(profile: ProfileData) -> ProfileData:
+	# Cumulative time does not add up across functions, so modules only sum tottime and calls
+	modules: ProfileData = {}
+	for (module, _), (calls, tottime, _) in profile.items():
+		module_calls, module_tottime, _ = modules.get((module, ""), (0, 0, 0))
+		modules[(module, "")] = (module_calls + calls, module_tottime + tottime, 0)
+	return modules
+
+
+def get_change(old: float, new: float) -> float:
+	if old == 0:
+		return float("inf") if new > 0 else 0
+	return (new - old) / old
+
+
+def compare(old: ProfileData, new: ProfileData, threshold: float, min_time: float, min_calls: float) -> list[tuple[tuple[str, str], tuple[float, float, float], tuple[float, float, float], list[str]]]:
+	# [(key, old stats, new stats, regressed stats)], worst tottime increase first
+	rows = []
+	for key in old.keys() | new.keys():
+		old_stats = old.get(key, (0, 0, 0))
+		new_stats = new.get(key, (0, 0, 0))
+
+		regressed = []
+		if new_stats[0] - old_stats[0] >= min_calls and get_change(old_stats[0], new_stats[0]) > threshold:
+			regressed.append("calls")
+		if new_stats[1] - old_stats[1] >= min_time and get_change(old_stats[1], new_stats[1]) > threshold:
+			regressed.append("tottime")
+		if new_stats[2] - old_stats[2] >= min_time and get_change(old_stats[2], new_stats[2]) > threshold:
+			regressed.append("cumtime")
+
+		if len(regressed) != 0:
+			rows.append((key, old_stats, new_stats, regressed))
+
+	rows.sort(key=lambda row: row[2][1] - row[1][1], reverse=True)
+	return rows
+
+
+def format_rows(title: str, rows: list, limit: int) -> str:
+	lines = [title, f"{'calls/frame':>24}{'tottime ms':>24}{'cumtime ms':>24}  name"]
+
+	for (module, function_name), old_stats, new_stats, regressed in rows[:limit]:
+		columns = "".join(f"{f'{old_value:.3f} -> {new_value:.3f}':>24}" for old_value, new_value in zip(old_stats, new_stats))
+		name = f"{module}:{function_name}" if function_name != "" else module
+		lines.append(f"{columns}  {name}  [{', '.join(regressed)}]")
+
+	if len(rows) > limit:
+		lines.append(f"... {len(rows) - limit} more")
+	if len(rows) == 0:
+		lines.append("No regressions")
+
+	return "\n".join(lines)
+
+
+def compare_profiles(args: argparse.Namespace) -> bool:
+	old = load_profile(args.old)
+	new = load_profile(args.new)
+
+	old_frames = args.old_frames if args.old_frames is not None else get_frame_count(old)
+	new_frames = args.new_frames if args.new_frames is not None else get_frame_count(new)
+	print(f"Normalized per frame, {old_frames} old frames and {new_frames} new frames\n")
+
+	old = normalize(old, old_frames)
+	new = normalize(new, new_frames)
+
+	function_rows = compare(old, new, args.threshold, args.min_time, args.min_calls)
+	module_rows = compare(get_module_totals(old), get_module_totals(new), args.threshold, args.min_time, args.min_calls)
+
+	print(format_rows("Function regressions", function_rows, args.limit))
+	print()
+	print(format_rows("Module regressions", module_rows, args.limit))
+
+	# With watched functions, only those fail the comparison
+	if len(args.watch) != 0:
+		function_rows = [row for row in function_rows if any(pattern in f"{row[0][0]}:{row[0][1]}" for pattern in args.watch)]
+
+		print()
+		print(format_rows("Watched function regressions", function_rows, args.limit))
+
+	return len(function_rows) == 0
+
+
+def load_benchmark(path: pathlib.Path) -> dict[str, dict[str, float]]:
+	with open(path, "r") as benchmark_file:
+		return json.load(benchmark_file)["sections"]
+
+
+def compare_benchmarks(args: argparse.Namespace) -> bool:
+	# Benchmark results are already per frame
+	old = load_benchmark(args.old)
+	new = load_benchmark(args.new)
+
+	passed = True
+	lines = [f"{'section':<20}{'mean ms':>24}{'p95 ms':>24}{'p99 ms':>24}"]
+	for section in sorted(old.keys() | new.keys()):
+		old_stats = old.get(section, {})
+		new_stats = new.get(section, {})
+
+		columns = ""
+		regressed = False
+		for stat in ("mean_ms", "p95_ms", "p99_ms"):
+			old_value = old_stats.get(stat, 0)
+			new_value = new_stats.get(stat, 0)
+
+			columns += f"{f'{old_value:.3f} -> {new_value:.3f}':>24}"
+			if new_value - old_value >= args.min_time and get_change(old_value, new_value) > args.threshold:
+				regressed = True
+
+		lines.append(f"{section:<20}{columns}{'  [regressed]' if regressed else ''}")
+		if regressed and (len(args.watch) == 0 or any(pattern in section for pattern in args.watch)):
+			passed = False
+
+	print("\n".join(lines))
+	return passed
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Compares two cProfile dumps, or two replay benchmark results, and reports regressions")
+	parser.add_argument("old", type=pathlib.Path, help="Baseline .prof dump or benchmark .json")
+	parser.add_argument("new", type=pathlib.Path, help="New .prof dump or benchmark .json")
+	parser.add_argument("--old-frames", type=int, help="Frames in the old profile, counted from Game.update calls by default")
+	parser.add_argument("--new-frames", type=int, help="Frames in the new profile, counted from Game.update calls by default")
+	parser.add_argument("--threshold", type=float, default=0.1, help="Relative increase that counts as a regression")
+	parser.add_argument("--min-time", type=float, default=0.01, help="Smallest increase in ms per frame that counts as a regression")
+	parser.add_argument("--min-calls", type=float, default=1, help="Smallest increase in calls per frame that counts as a regression")
+	parser.add_argument("--limit", type=int, default=30, help="Rows to show per table")
+	parser.add_argument("--watch", action="append", default=[], help="Only fail on functions, or sections, containing this, can be repeated")
+	parser.add_argument("--fail", action="store_true", help="Exit with 1 on a regression, to gate merges")
+	args = parser.parse_args()
+
+	if args.old.suffix == ".json" and args.new.suffix == ".json":
+		passed = compare_benchmarks(args)
+	else:
+		passed = compare_profiles(args)
+
+	if args.fail and not passed:
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -6,6 +6,7 @@ import pygame.geometry
 
 import pygbase
 
+from collision import get_circle_push_out, sweep_rect
 from level import Level
 
 
@@ -35,7 +36,12 @@ class Projectile:
 		self.has_just_collided = False
 		self.damage = damage
 
-	def movement(self, delta, colliders: list[pygame.Rect]):
+	def get_bounds(self) -> pygame.FRect:
+		# Swept against colliders as a box
+		radius = self.collider.radius
+		return pygame.FRect(self.pos.x - radius, self.pos.y - radius, radius * 2, radius * 2)
+
+	def movement(self, delta, colliders: list[pygame.Rect], dynamic_colliders: list[pygame.Rect]):
 		if self.on_ground:
 			self.acceleration.x = -self.velocity.x * self.ground_damping
 		elif self.pos.y > self.water_lever:
@@ -48,27 +54,15 @@ class Projectile:
 
 		x_movement = self.velocity.x * delta + 0.5 * self.acceleration.x * (delta ** 2)
 
-		self.pos.x += x_movement
-		self.collider.center = self.pos
-
-		for rect in colliders:
-			if self.collider.colliderect(rect):
-				self.pos.x -= x_movement
-				self.collider.center = self.pos
-
-				if self.collider.colliderect(rect):
-					if abs(self.pos.x - rect.left) < abs(self.pos.x - rect.right):  # Closer to left than right
-						self.pos.x = rect.left - self.collider.radius * 1.3
-					else:
-						self.pos.x = rect.right + self.collider.radius * 1.3
+		time_of_impact, _, collider = sweep_rect(self.get_bounds(), (x_movement, 0), colliders)
+		self.pos.x += x_movement * time_of_impact
 
-				self.velocity.x *= -self.bounce[0]
-
-				if not self.has_collided:
-					self.has_just_collided = True
-					self.has_collided = True
+		if collider is not None:
+			self.velocity.x *= -self.bounce[0]
 
-				break
+			if not self.has_collided:
+				self.has_just_collided = True
+				self.has_collided = True
 
 		self.collider.center = self.pos
 
@@ -84,34 +78,41 @@ class Projectile:
 
 		y_movement = self.velocity.y * delta + 0.5 * self.acceleration.y * (delta ** 2)
 
-		self.pos.y += y_movement
-		self.collider.center = self.pos
+		time_of_impact, _, collider = sweep_rect(self.get_bounds(), (0, y_movement), colliders)
+		self.pos.y += y_movement * time_of_impact
 
-		self.on_ground = False
-		for rect in colliders:
-			if self.collider.colliderect(rect):
-				self.on_ground = True
+		self.on_ground = collider is not None
+		if collider is not None:
+			self.velocity.y *= -self.bounce[1]
 
-				self.pos.y -= y_movement
-				self.collider.center = self.pos
+			if not self.has_collided:
+				self.has_just_collided = True
+				self.has_collided = True
 
-				if self.collider.colliderect(rect):
-					if abs(self.pos.x - rect.left) < abs(self.pos.x - rect.right):  # Closer to left than right
-						self.pos.x = rect.left - self.collider.radius * 1.3
-					else:
-						self.pos.x = rect.right + self.collider.radius * 1.3
+		self.collider.center = self.pos
 
-				self.velocity.y *= -self.bounce[1]
+		# Only level colliders are swept, as dynamic ones (like the player) move into the projectile, and the sweep skips anything already overlapped
+		for collider in [*dynamic_colliders, *colliders]:
+			if not self.collider.colliderect(collider):
+				continue
 
-				if not self.has_collided:  # The or is for both collisions in same frame
-					self.has_just_collided = True
-					self.has_collided = True
+			x_push, y_push = get_circle_push_out(self.pos, self.collider.radius, collider)
+			self.pos.x += x_push
+			self.pos.y += y_push
+
+			if abs(x_push) > abs(y_push):
+				self.velocity.x *= -self.bounce[0]
+			else:
+				self.velocity.y *= -self.bounce[1]
 
-				break
+			if not self.has_collided:
+				self.has_just_collided = True
+				self.has_collided = True
 
-		self.collider.center = self.pos
+			self.collider.center = self.pos
+			break
 
-	def update(self, delta: float, colliders: list[pygame.Rect]):
+	def update(self, delta: float, colliders: list[pygame.Rect], dynamic_colliders: list[pygame.Rect]):
 		if self.velocity.length() < 50:
 			self.has_collided = True
 
@@ -119,7 +120,7 @@ class Projectile:
 
 		if self.has_collided:
 			self.has_just_collided = False
-		self.movement(delta, colliders)
+		self.movement(delta, colliders, dynamic_colliders)
 
 	def alive(self):
 		return not self.despawn_timer.done()
@@ -145,10 +146,12 @@ class ProjectileGroup:
 	def __init__(self, level: Level):
 		self.projectiles: list[Projectile] = []
 
-		self.level_colliders = {tile_pos: tile.rect for tile_pos, tile in level.tiles[0].items()}
-		self.colliders = level.get_colliders()
+		self.collision_grid = level.merged_collision_grid
 		self.tile_size = pygbase.Common.get_value("tile_size")
 
+		# Area around each projectile to fetch level colliders from
+		self.surrounding_rect = pygame.Rect(0, 0, self.tile_size[0] * 4, self.tile_size[1] * 4)
+
 	def add_projectile(self, projectile: Projectile):
 		self.projectiles.append(projectile)
 
@@ -157,18 +160,11 @@ class ProjectileGroup:
 		hits: list[tuple[pygame.geometry.Circle, int]] = []
 
 		for projectile in self.projectiles:
-			tile_pos = int(projectile.pos.x // self.tile_size[0]), int(projectile.pos.y // self.tile_size[1])
-			top_left = (tile_pos[0] - 2, tile_pos[1] - 2)
-			bottom_right = (tile_pos[0] + 2, tile_pos[1] + 2)
-
-			surrounding_colliders = []
-			for row in range(top_left[1], bottom_right[1]):
-				for col in range(top_left[0], bottom_right[0]):
-					rect = self.level_colliders.get((col, row))
-					if rect is not None:
-						surrounding_colliders.append(rect)
-
-			projectile.update(delta, [*surrounding_colliders, *dynamic_colliders])
+			self.surrounding_rect.center = projectile.pos
+			# Also covers where the projectile is moving to this step
+			surrounding_colliders = self.collision_grid.get_colliders(self.surrounding_rect.union(self.surrounding_rect.move(projectile.velocity * delta)))
+
+			projectile.update(delta, surrounding_colliders, dynamic_colliders)
 
 			# print(projectile, projectile.has_collided, projectile.has_just_collided)
 			if projectile.has_just_collided:
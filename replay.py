@@ -0,0 +1,145 @@
+import pathlib
+import struct
+
+import pygame
+import pygbase
+
+from files import REPLAY_DIR
+from input_source import InputSource, LiveInput
+
+# Replays of the same parts of the level, to compare performance between changes
+CANONICAL_REPLAYS = ("surface_run", "dive", "focal_point_fight", "boss_fight")
+
+# Only the keys the player reads are recorded, as bits in the order given
+TRACKED_KEYS = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s)
+TRACKED_MOUSE_BUTTONS = (0, 1, 2)
+
+REPLAY_MAGIC = b"BPRP"
+REPLAY_VERSION = 1
+
+# Magic, version, random seed, start checkpoint, number of frames
+HEADER_FORMAT = struct.Struct("<4sBiiI")
+
+# Delta, key bits, mouse button bits, mouse world x, mouse world y
+FRAME_FORMAT = struct.Struct("<dBBdd")
+
+
+class Replay:
+	def __init__(self, seed: int, start_checkpoint: int, frames: list[tuple[float, int, int, float, float]] | None = None):
+		self.seed = seed
+		self.start_checkpoint = start_checkpoint
+
+		# [(delta, key bits, mouse button bits, mouse world x, mouse world y)]
+		self.frames = frames if frames is not None else []
+
+	@classmethod
+	def load(cls, path: pathlib.Path) -> "Replay":
+		with open(path, "rb") as replay_file:
+			data = replay_file.read()
+
+		magic, version, seed, start_checkpoint, num_frames = HEADER_FORMAT.unpack_from(data)
+		if magic != REPLAY_MAGIC:
+			raise ValueError(f"{path} is not a replay file")
+		if version != REPLAY_VERSION:
+			raise ValueError(f"{path} is replay version {version}, expected {REPLAY_VERSION}")
+
+		frames = list(FRAME_FORMAT.iter_unpack(data[HEADER_FORMAT.size:HEADER_FORMAT.size + num_frames * FRAME_FORMAT.size]))
+
+		return cls(seed, start_checkpoint, frames)
+
+	def save(self, path: pathlib.Path):
+		path.parent.mkdir(parents=True, exist_ok=True)
+
+		with open(path, "wb") as replay_file:
+			replay_file.write(HEADER_FORMAT.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.start_checkpoint, len(self.frames)))
+			replay_file.write(b"".join(FRAME_FORMAT.pack(*frame) for frame in self.frames))
+
+
+def get_replay_path(name: str) -> pathlib.Path:
+	return REPLAY_DIR / f"{name}.replay"
+
+
+class InputRecorder(InputSource):
+	def __init__(self, replay: Replay):
+		self.live_input = LiveInput()
+		self.replay = replay
+
+		self.frame: list | None = None
+		self.mouse_world_pos_read = False
+
+	def _finish_frame(self):
+		if self.frame is not None:
+			self.replay.frames.append(tuple(self.frame))
+
+	def next_frame(self, delta: float):
+		self._finish_frame()
+
+		key_bits = 0
+		for bit, key in enumerate(TRACKED_KEYS):
+			if self.live_input.get_key_pressed(key):
+				key_bits |= 1 << bit
+
+		mouse_button_bits = 0
+		for bit, button in enumerate(TRACKED_MOUSE_BUTTONS):
+			if self.live_input.get_mouse_pressed(button):
+				mouse_button_bits |= 1 << bit
+
+		# The mouse world pos is filled in the first time it is read this frame, as it depends on the camera
+		mouse_world_pos = self.frame[3:5] if self.frame is not None else [0.0, 0.0]
+		self.frame = [delta, key_bits, mouse_button_bits, *mouse_world_pos]
+		self.mouse_world_pos_read = False
+
+	def stop(self):
+		self._finish_frame()
+		self.frame = None
+
+	def get_key_pressed(self, key: int) -> bool:
+		return self.live_input.get_key_pressed(key)
+
+	def get_mouse_pressed(self, button: int) -> bool:
+		return self.live_input.get_mouse_pressed(button)
+
+	def get_mouse_world_pos(self, camera: pygbase.Camera) -> pygame.Vector2:
+		if self.frame is None:
+			return self.live_input.get_mouse_world_pos(camera)
+
+		# Returns the recorded pos for the whole frame, so the replay sees exactly the same thing
+		if not self.mouse_world_pos_read:
+			self.frame[3:5] = self.live_input.get_mouse_world_pos(camera)
+			self.mouse_world_pos_read = True
+
+		return pygame.Vector2(self.frame[3], self.frame[4])
+
+
+class ReplayInput(InputSource):
+	def __init__(self, replay: Replay):
+		self.replay = replay
+
+		self.frame_index = -1
+		self.key_bits = 0
+		self.mouse_button_bits = 0
+		self.mouse_world_pos = pygame.Vector2()
+
+		self.key_bit_key = {key: 1 << bit for bit, key in enumerate(TRACKED_KEYS)}
+		self.mouse_button_bit_key = {button: 1 << bit for bit, button in enumerate(TRACKED_MOUSE_BUTTONS)}
+
+	def done(self) -> bool:
+		return self.frame_index >= len(self.replay.frames) - 1
+
+	def peek_delta(self) -> float:
+		return self.replay.frames[self.frame_index + 1][0]
+
+	def next_frame(self, delta: float):
+		if not self.done():
+			self.frame_index += 1
+			_, self.key_bits, self.mouse_button_bits, mouse_x, mouse_y = self.replay.frames[self.frame_index]
+			self.mouse_world_pos.update(mouse_x, mouse_y)
+
+	def get_key_pressed(self, key: int) -> bool:
+		return bool(self.key_bits & self.key_bit_key.get(key, 0))
+
+	def get_mouse_pressed(self, button: int) -> bool:
+		return bool(self.mouse_button_bits & self.mouse_button_bit_key.get(button, 0))
+
+	def get_mouse_world_pos(self, camera: pygbase.Camera) -> pygame.Vector2:
+		return self.mouse_world_pos.copy()
@@ -0,0 +1,100 @@
+import collections
+import cProfile
+import json
+import logging
+import pathlib
+import time
+
+from files import PROFILE_DIR
+from timing import FrameTimings
+
+
+class SpikeProfiler:
+	def __init__(self, timings: FrameTimings, budget: float = 1 / 30, capture_frames: int = 30, history: int = 120, cooldown_frames: int = 300, max_captures: int = 20, output_dir: pathlib.Path = PROFILE_DIR):
+		self.timings = timings
+
+		self.budget = budget  # Frames longer than this, in seconds, start a capture
+		self.capture_frames = capture_frames
+		self.cooldown_frames = cooldown_frames  # Stops one long hitch from being captured over and over
+		self.max_captures = max_captures
+
+		# Section times of the last frames, so what led up to the spike is kept too
+		self.recent_frames: collections.deque[dict[str, float]] = collections.deque(maxlen=history)
+
+		self.output_dir = output_dir
+		self.session_name = time.strftime("%Y%m%d-%H%M%S")
+		self.num_captures = 0
+
+		self.profiler: cProfile.Profile | None = None
+		self.frames_left = 0
+		self.cooldown_left = 0
+
+		# Filled in when a capture starts
+		self.spike_info: dict = {}
+
+	def is_capturing(self) -> bool:
+		return self.profiler is not None
+
+	def update(self, get_state_summary):
+		# Called once a frame, after the last frame was timed. `get_state_summary` is only called around captures
+		frame_times = self.timings.last_frame_times
+		frame_time = self.timings.last_frame_time
+
+		if len(frame_times) == 0:
+			return
+
+		self.recent_frames.append(frame_times)
+
+		if self.is_capturing():
+			self.frames_left -= 1
+			if self.frames_left <= 0:
+				self._finish_capture(get_state_summary())
+
+		elif self.cooldown_left > 0:
+			self.cooldown_left -= 1
+
+		elif frame_time > self.budget and self.num_captures < self.max_captures:
+			self._start_capture(frame_time, get_state_summary())
+
+	def _start_capture(self, frame_time: float, state_summary: dict):
+		self.spike_info = {
+			"spike_frame": self.timings.num_frames,
+			"spike_time_ms": frame_time * 1000,
+			"budget_ms": self.budget * 1000,
+			"spike_sections_ms": {section: section_time * 1000 for section, section_time in self.timings.last_frame_times.items()},
+			"state_at_spike": state_summary
+		}
+
+		self.frames_left = self.capture_frames
+
+		self.profiler = cProfile.Profile()
+		self.profiler.enable()
+
+	def _finish_capture(self, state_summary: dict):
+		self.profiler.disable()
+
+		self.output_dir.mkdir(parents=True, exist_ok=True)
+		capture_name = f"spike_{self.session_name}_{self.num_captures:03d}"
+
+		self.profiler.dump_stats(self.output_dir / f"{capture_name}.prof")
+
+		self.spike_info["captured_frames"] = self.capture_frames
+		self.spike_info["state_after_capture"] = state_summary
+
+		# Oldest first, the last `capture_frames` are the frames that were profiled
+		self.spike_info["recent_frames_ms"] = [{section: section_time * 1000 for section, section_time in frame_times.items()} for frame_times in self.recent_frames]
+
+		with open(self.output_dir / f"{capture_name}.json", "w") as summary_file:
+			summary_file.write(json.dumps(self.spike_info, indent=2))
+
+		logging.info(f"Captured {self.spike_info['spike_time_ms']:.1f}ms spike to {capture_name}")
+
+		self.profiler = None
+		self.spike_info = {}
+		self.num_captures += 1
+		self.cooldown_left = self.cooldown_frames
+
+	def stop(self):
+		if self.profiler is not None:
+			self.profiler.disable()
+			self.profiler = None
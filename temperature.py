@@ -3,6 +3,11 @@ import pygbase
 
 
 class Temperature:
+	GAUGE_FILL_LEVELS = 64
+
+	# {(fill_level, colour): gauge surface}, shared as every gauge uses the same images
+	gauge_cache: dict[tuple[int, tuple[int, int, int, int]], pygame.Surface] = {}
+
 	def __init__(
 			self,
 			pos: tuple | pygame.Vector2,
@@ -24,6 +29,9 @@ class Temperature:
 
 		self.color_range: tuple[pygame.Color, pygame.Color] = color_range
 
+		self.gauge_key: tuple[int, tuple[int, int, int] | None] | None = None
+		self.gauge_surface: pygame.Surface | None = None
+
 	def link_pos(self, pos: pygame.Vector2) -> "Temperature":
 		self.pos = pos
 		return self
@@ -40,24 +48,40 @@ class Temperature:
 	def get_percentage(self) -> float:
 		return self.temperature / self.max_temperature
 
+	def _get_gauge_surface(self, fill_level: int, mask_color: tuple[int, int, int, int]) -> pygame.Surface:
+		key = (fill_level, mask_color)
+
+		if key not in self.gauge_cache:
+			percentage = fill_level / self.GAUGE_FILL_LEVELS
+
+			self.background_mask.fill((0, 0, 0, 0))
+			pygame.draw.rect(self.background_mask, mask_color, (
+				0, self.background_mask.get_height() * (1 - percentage),
+				self.background_mask.get_width(), self.background_mask.get_height() * percentage
+			))
+
+			gauge_surface = self.background_image.get_image().copy()
+			gauge_surface.blit(self.background_mask, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
+
+			self.gauge_cache[key] = gauge_surface
+
+		return self.gauge_cache[key]
+
 	def draw(self, surface: pygame.Surface, camera: pygbase.Camera, color_override: tuple[int, int, int] | None = None):
-		self.background_mask.fill((0, 0, 0, 0))
-
-		if color_override is None:
-			color = self.color_range[0].lerp(self.color_range[1], self.get_percentage())
-			mask_color = (color.r, color.g, color.b, 255)
-		else:
-			mask_color = (*color_override, 255)
-		pygame.draw.rect(self.background_mask, mask_color, (
-			0, self.background_mask.get_height() * (1 - self.get_percentage()),
-			self.background_mask.get_width(), self.background_mask.get_height() * self.get_percentage()
-		))
-
-		background_surface = self.background_image.get_image().copy()
-		background_surface.blit(self.background_mask, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
-
-		surface.blit(background_surface, camera.world_to_screen(self.pos + self.offset + (-self.background_mask.get_width() / 2, -self.background_mask.get_height())))
-		self.image.draw(surface, camera.world_to_screen(self.pos + self.offset), draw_pos="midbottom")
-
-# pygame.draw.rect(surface, (40, 40, 40), (camera.world_to_screen(self.pos + self.offset), (40, 100)))
-# pygame.draw.rect(surface, (200, 200, 200), (camera.world_to_screen(self.pos + self.offset + (3, 3 + 94 * (1 - self.get_percentage()))), (34, 94 * self.get_percentage())))
+		fill_level = round(self.get_percentage() * self.GAUGE_FILL_LEVELS)
+
+		# Only look up a new gauge when the quantized temperature changes
+		if (fill_level, color_override) != self.gauge_key:
+			self.gauge_key = (fill_level, color_override)
+
+			if color_override is None:
+				color = self.color_range[0].lerp(self.color_range[1], fill_level / self.GAUGE_FILL_LEVELS)
+				mask_color = (color.r, color.g, color.b, 255)
+			else:
+				mask_color = (*color_override, 255)
+
+			self.gauge_surface = self._get_gauge_surface(fill_level, mask_color)
+
+		screen_pos = camera.world_to_screen(self.pos + self.offset)
+		surface.blit(self.gauge_surface, (screen_pos[0] - self.gauge_surface.get_width() / 2, screen_pos[1] - self.gauge_surface.get_height()))
+		self.image.draw(surface, screen_pos, draw_pos="midbottom")
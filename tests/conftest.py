@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# The game modules live at the top of the repo rather than in a package
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
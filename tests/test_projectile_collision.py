@@ -0,0 +1,47 @@
+import pygame
+import pygame.geometry
+import pytest
+
+from collision import get_circle_push_out, sweep_rect
+
+
+def test_sweep_skips_colliders_the_rect_starts_inside_of():
+	# Why overlaps have to be checked separately from the sweep
+	player_rect = pygame.Rect(0, 0, 40, 80)
+	bounds = pygame.FRect(10, 10, 20, 20)
+
+	time_of_impact, _, collider = sweep_rect(bounds, (5, 0), [player_rect])
+
+	assert time_of_impact == 1.0
+	assert collider is None
+
+
+@pytest.mark.parametrize("center", [
+	# Center inside of the collider, like a projectile the player walked into
+	(21.666666, 40.42),
+	(20, 40),
+	(3, 75),
+	# Center outside of the collider, overlapping a side or a corner
+	(45, 40),
+	(20, -6),
+	(46, 85),
+	(-5.5, -4.5),
+])
+def test_push_out_leaves_the_circle_clear_of_the_collider(center):
+	player_rect = pygame.Rect(0, 0, 40, 80)
+	radius = 10
+
+	x_push, y_push = get_circle_push_out(center, radius, player_rect)
+
+	assert not pygame.geometry.Circle((center[0] + x_push, center[1] + y_push), radius).colliderect(player_rect)
+
+
+def test_push_out_takes_the_closest_side():
+	player_rect = pygame.Rect(0, 0, 40, 80)
+
+	assert get_circle_push_out((30, 40), 10, player_rect) == pytest.approx((20.01, 0))
+	assert get_circle_push_out((20, 5), 10, player_rect) == pytest.approx((0, -15.01))
+
+
+def test_push_out_of_a_collider_the_circle_does_not_overlap_is_nothing():
+	assert get_circle_push_out((60, 40), 10, pygame.Rect(0, 0, 40, 80)) == (0, 0)
@@ -3,14 +3,15 @@ import pygbase
 
 
 class Tile:
+	# There are thousands of tiles, so they don't each carry a dict
+	__slots__ = ("screen_size", "parallax_layer", "parallax_amount", "parallax_factor", "pos", "from_sheet", "name", "sheet_name", "sheet_index", "image", "_rect", "collider_rect")
+
 	def __init__(self, pos: tuple[int, int], tile_size: tuple[float, float], parallax_layer: int, parallax_amount: float):
 		self.screen_size = pygbase.Common.get_value("screen_size")
 
 		self.parallax_layer: int = parallax_layer
 		self.parallax_amount: float = parallax_amount
 
-		self.buffer_factor = 1.08 if self.parallax_layer != 0 else 1
-
 		self.parallax_factor = max(1 + self.parallax_layer * self.parallax_amount, 0)
 
 		self.pos: pygame.Vector2 = pygame.Vector2(pos[0] * tile_size[0], pos[1] * tile_size[1])
@@ -21,12 +22,15 @@ class Tile:
 		self.sheet_name: str | None = None
 		self.sheet_index: int | None = None
 
-		self.original_image: pygbase.Image | None = None
 		self.image: pygame.Surface | None = None
 
 		self._rect: pygame.Rect = pygame.Rect(self.pos, (tile_size[0] * self.parallax_factor, tile_size[1] * self.parallax_factor))
 		self.collider_rect: pygame.Rect | None = None
 
+	def get_buffer_factor(self) -> float:
+		# Parallax images are scaled up slightly, so no gaps show between them
+		return 1.08 if self.parallax_layer != 0 else 1
+
 	@property
 	def rect(self):
 		if self.collider_rect is None:
@@ -38,12 +42,11 @@ class Tile:
 		self.from_sheet = False
 		self.name = tile_name
 
-		self.original_image = pygbase.ResourceManager.get_resource("tiles", tile_name)
-		image: pygame.Surface = self.original_image.get_image()
+		image: pygame.Surface = pygbase.ResourceManager.get_resource("tiles", tile_name).get_image()
 
 		image_cache = pygbase.Common.get_value("parallax_image_cache")
 		if (self.parallax_layer, tile_name) not in image_cache:
-			self.image = image_cache[(self.parallax_layer, tile_name)] = pygame.transform.scale_by(image, self.parallax_factor * self.buffer_factor)
+			self.image = image_cache[(self.parallax_layer, tile_name)] = pygame.transform.scale_by(image, self.parallax_factor * self.get_buffer_factor())
 		else:
 			self.image = image_cache[(self.parallax_layer, tile_name)]
 
@@ -71,12 +74,11 @@ class Tile:
 		self.sheet_name = sheet_name
 		self.sheet_index = index
 
-		self.original_image = pygbase.ResourceManager.get_resource("tile_sheets", sheet_name).get_image(index)
-		image: pygame.Surface = self.original_image.get_image()
+		image: pygame.Surface = pygbase.ResourceManager.get_resource("tile_sheets", sheet_name).get_image(index).get_image()
 
 		image_cache = pygbase.Common.get_value("parallax_image_cache")
 		if (self.parallax_layer, sheet_name, index) not in image_cache:
-			self.image = image_cache[(self.parallax_layer, sheet_name, index)] = pygame.transform.scale_by(image, self.parallax_factor * self.buffer_factor)
+			self.image = image_cache[(self.parallax_layer, sheet_name, index)] = pygame.transform.scale_by(image, self.parallax_factor * self.get_buffer_factor())
 		else:
 			self.image = image_cache[(self.parallax_layer, sheet_name, index)]
 
@@ -0,0 +1,81 @@
+import numpy as np
+
+from level_file import LevelData
+
+
+class TileStreamer:
+	def __init__(self, level_data: LevelData, chunk_size: int = 8, margin: int = 1, max_activations_per_frame: int = 4):
+		self.level_data = level_data
+		self.chunk_size = chunk_size  # Chunk width and height in tiles
+
+		self.margin = margin  # Chunks around the visible ones that are made ahead of time
+		self.max_activations_per_frame = max_activations_per_frame
+
+		# {layer: tiles sorted by chunk}
+		self.layers: dict[int, np.ndarray] = {}
+
+		# {(tile_layer, chunk_pos): (start, end)} into the sorted tiles of the layer
+		self.chunk_ranges: dict[tuple[int, tuple[int, int]], tuple[int, int]] = {}
+
+		for layer_index, tiles in level_data.layers.items():
+			if len(tiles) == 0:
+				continue
+
+			chunk_x = tiles["x"] // chunk_size
+			chunk_y = tiles["y"] // chunk_size
+			order = np.lexsort((chunk_x, chunk_y))
+
+			self.layers[layer_index] = tiles[order]
+			chunk_x = chunk_x[order]
+			chunk_y = chunk_y[order]
+
+			starts = np.flatnonzero((np.diff(chunk_x) != 0) | (np.diff(chunk_y) != 0)) + 1
+			for start, end in zip([0, *starts.tolist()], [*starts.tolist(), len(tiles)]):
+				self.chunk_ranges[(layer_index, (int(chunk_x[start]), int(chunk_y[start])))] = (start, end)
+
+		# Chunks that have their tiles made
+		self.active_chunks: set[tuple[int, tuple[int, int]]] = set()
+
+	def get_chunk_pos(self, tile_pos: tuple[int, int]) -> tuple[int, int]:
+		return tile_pos[0] // self.chunk_size, tile_pos[1] // self.chunk_size
+
+	def get_chunk_tiles(self, key: tuple[int, tuple[int, int]]) -> list[tuple[tuple[int, int], tuple[bool, str, int]]]:
+		# [(tile_pos, palette entry)]
+		start, end = self.chunk_ranges[key]
+		palette = self.level_data.palette
+		return [((x, y), palette[palette_index]) for x, y, palette_index in self.layers[key[0]][start:end].tolist()]
+
+	def get_chunks(self, layer_index: int, top_left: tuple[int, int], bottom_right: tuple[int, int], margin: int) -> set[tuple[int, tuple[int, int]]]:
+		# Chunks with tiles in the inclusive tile range, grown by `margin` chunks
+		top_left_chunk = self.get_chunk_pos(top_left)
+		bottom_right_chunk = self.get_chunk_pos(bottom_right)
+
+		chunks = set()
+		for chunk_row in range(top_left_chunk[1] - margin, bottom_right_chunk[1] + margin + 1):
+			for chunk_col in range(top_left_chunk[0] - margin, bottom_right_chunk[0] + margin + 1):
+				key = (layer_index, (chunk_col, chunk_row))
+				if key in self.chunk_ranges:
+					chunks.add(key)
+		return chunks
+
+	def update(self, visible_ranges: dict[int, tuple[tuple[int, int], tuple[int, int]]]) -> tuple[list[tuple[int, tuple[int, int]]], list[tuple[int, tuple[int, int]]]]:
+		# Chunks to make and chunks to release, from the inclusive visible tile range of each layer
+		visible = set()
+		nearby = set()
+		kept = set()
+		for layer_index, (top_left, bottom_right) in visible_ranges.items():
+			visible |= self.get_chunks(layer_index, top_left, bottom_right, 0)
+			nearby |= self.get_chunks(layer_index, top_left, bottom_right, self.margin)
+
+			# Chunks are released further out than they are made, so moving back and forth on a chunk edge doesn't churn
+			kept |= self.get_chunks(layer_index, top_left, bottom_right, self.margin + 1)
+
+		# Visible chunks are always made straight away, so they are never drawn missing
+		to_activate = list(visible - self.active_chunks)
+		to_activate.extend(list(nearby - visible - self.active_chunks)[:self.max_activations_per_frame])
+		to_deactivate = list(self.active_chunks - kept)
+
+		self.active_chunks.update(to_activate)
+		self.active_chunks.difference_update(to_deactivate)
+
+		return to_activate, to_deactivate
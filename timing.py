@@ -0,0 +1,184 @@
+import collections
+import time
+
+import numpy as np
+import pygame
+
+from files import FONT_PATH
+
+
+class FrameTimings:
+	def __init__(self, history: int = 300):
+		self.lap_start = time.perf_counter()
+
+		# {section: seconds} for the frame being timed, a section can be lapped more than once a frame
+		self.frame_times: dict[str, float] = {}
+		self.last_frame_times: dict[str, float] = {}
+		self.last_frame_time = 0
+
+		# {section: seconds} over every finished frame
+		self.total_times: dict[str, float] = {}
+		self.max_times: dict[str, float] = {}
+		self.num_frames = 0
+
+		# {section: seconds of the last `history` frames the section ran in}, for rolling stats
+		self.history = history
+		self.section_history: dict[str, collections.deque[float]] = {}
+		self.frame_history: collections.deque[float] = collections.deque(maxlen=history)
+
+	def reset(self):
+		self.frame_times.clear()
+		self.last_frame_times = {}
+		self.last_frame_time = 0
+		self.total_times.clear()
+		self.max_times.clear()
+		self.num_frames = 0
+
+		self.section_history.clear()
+		self.frame_history.clear()
+
+		self.restart()
+
+	def restart(self):
+		self.lap_start = time.perf_counter()
+
+	def lap(self, section: str):
+		# Time since the last lap goes to this section
+		now = time.perf_counter()
+		self.frame_times[section] = self.frame_times.get(section, 0) + now - self.lap_start
+		self.lap_start = now
+
+	def end_frame(self):
+		if len(self.frame_times) == 0:
+			return
+
+		frame_time = 0
+		for section, section_time in self.frame_times.items():
+			self.total_times[section] = self.total_times.get(section, 0) + section_time
+			self.max_times[section] = max(self.max_times.get(section, 0), section_time)
+
+			if section not in self.section_history:
+				self.section_history[section] = collections.deque(maxlen=self.history)
+			self.section_history[section].append(section_time)
+
+			frame_time += section_time
+
+		self.frame_history.append(frame_time)
+
+		self.last_frame_times = self.frame_times
+		self.last_frame_time = frame_time
+		self.frame_times = {}
+		self.num_frames += 1
+
+	def new_frame(self):
+		self.end_frame()
+		self.restart()
+
+	@staticmethod
+	def get_rolling_stats(times: collections.deque[float]) -> tuple[float, float, float]:
+		# Mean, p95 and p99 in seconds
+		if len(times) == 0:
+			return 0, 0, 0
+
+		times = np.fromiter(times, dtype=float, count=len(times))
+		p95, p99 = np.percentile(times, (95, 99))
+		return float(times.mean()), float(p95), float(p99)
+
+	def get_section_stats(self) -> dict[str, tuple[float, float, float]]:
+		return {section: self.get_rolling_stats(times) for section, times in self.section_history.items()}
+
+	def get_frame_stats(self) -> tuple[float, float, float]:
+		return self.get_rolling_stats(self.frame_history)
+
+	def get_summary(self) -> dict:
+		# Per frame, in ms
+		sections = {}
+		for section, total_time in self.total_times.items():
+			_, p95, p99 = self.get_rolling_stats(self.section_history[section])
+			sections[section] = {"mean_ms": total_time / self.num_frames * 1000, "p95_ms": p95 * 1000, "p99_ms": p99 * 1000, "max_ms": self.max_times[section] * 1000}
+
+		if self.num_frames != 0:
+			_, p95, p99 = self.get_frame_stats()
+			sections["frame"] = {"mean_ms": sum(self.total_times.values()) / self.num_frames * 1000, "p95_ms": p95 * 1000, "p99_ms": p99 * 1000, "max_ms": max(self.frame_history) * 1000}
+
+		return {"num_frames": self.num_frames, "sections": sections}
+
+	def get_report(self) -> str:
+		if self.num_frames == 0:
+			return "No frames timed"
+
+		frame_total = sum(self.total_times.values())
+
+		lines = [f"{'section':<20}{'mean ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'share':>8}"]
+		for section, total_time in self.total_times.items():
+			_, p95, p99 = self.get_rolling_stats(self.section_history[section])
+			lines.append(f"{section:<20}{total_time / self.num_frames * 1000:>10.3f}{p95 * 1000:>10.3f}{p99 * 1000:>10.3f}{self.max_times[section] * 1000:>10.3f}{total_time / frame_total:>8.1%}")
+
+		_, p95, p99 = self.get_frame_stats()
+		lines.append(f"{'total':<20}{frame_total / self.num_frames * 1000:>10.3f}{p95 * 1000:>10.3f}{p99 * 1000:>10.3f}{'':>10}{'':>8}")
+		lines.append(f"{self.num_frames} frames, percentiles over the last {len(self.frame_history)}")
+
+		return "\n".join(lines)
+
+
+class TimingOverlay:
+	def __init__(self, timings: FrameTimings, frame_budget: float = 1 / 60, refresh_time: float = 0.25):
+		self.timings = timings
+		self.frame_budget = frame_budget
+
+		self.shown = False
+
+		# Percentiles are only recalculated a few times a second
+		self.refresh_timer = 0
+		self.refresh_time = refresh_time
+
+		self.font = pygame.font.Font(FONT_PATH, 14)
+		self.line_height = self.font.get_linesize()
+		self.surface: pygame.Surface | None = None
+
+	def toggle(self):
+		self.shown = not self.shown
+		self.refresh_timer = 0
+
+	def update(self, delta: float):
+		self.refresh_timer -= delta
+
+	def _render(self) -> pygame.Surface:
+		frame_stats = self.timings.get_frame_stats()
+
+		# [(name, (mean, p95, p99), color)]
+		rows = [("frame", frame_stats, "red" if frame_stats[1] > self.frame_budget else "white")]
+		for section, section_stats in self.timings.get_section_stats().items():
+			# Sections taking up over a quarter of the budget are what to look at
+			rows.append((section, section_stats, "orange" if section_stats[1] > self.frame_budget / 4 else "white"))
+
+		name_width = max(self.font.size(name)[0] for name, _, _ in rows) + 10
+		column_width = self.font.size("000.00")[0] + 10
+
+		surface = pygame.Surface((name_width + column_width * 3 + 10, (len(rows) + 1) * self.line_height + 10), flags=pygame.SRCALPHA)
+		surface.fill((0, 0, 0, 160))
+
+		# Times are in ms, right aligned in their columns
+		for column, text in enumerate(("mean", "p95", "p99")):
+			image = self.font.render(text, True, "light gray")
+			surface.blit(image, image.get_rect(topright=(5 + name_width + (column + 1) * column_width, 5)))
+
+		for row, (name, stats, color) in enumerate(rows):
+			y = 5 + (row + 1) * self.line_height
+
+			surface.blit(self.font.render(name, True, color), (5, y))
+			for column, value in enumerate(stats):
+				image = self.font.render(f"{value * 1000:.2f}", True, color)
+				surface.blit(image, image.get_rect(topright=(5 + name_width + (column + 1) * column_width, y)))
+
+		return surface
+
+	def draw(self, surface: pygame.Surface):
+		if not self.shown:
+			return
+
+		if self.surface is None or self.refresh_timer <= 0:
+			self.surface = self._render()
+			self.refresh_timer = self.refresh_time
+
+		surface.blit(self.surface, self.surface.get_rect(topright=(surface.get_width() - 10, 10)))
@@ -1,10 +1,12 @@
 import enum
 import random
+from typing import Callable
 
 import pygame
 import pygame.geometry
 import pygbase
 
+from collision import CollisionGrid, SpatialHash
 from level import Level
 from projectiles import ProjectileGroup, GarbageProjectile
 from temperature import Temperature
@@ -39,7 +41,7 @@ class WaterMonsterAI:
 		self.camera = pygbase.Common.get_value("camera")
 		self.tile_size = pygbase.Common.get_value("tile_size")
 
-	def update(self, delta: float, player_pos: pygame.Vector2, level_colliders: dict[tuple, pygame.Rect], in_water: bool):
+	def update(self, delta: float, player_pos: pygame.Vector2, collision_grid: CollisionGrid, in_water: bool):
 		offset_vector = player_pos - self.pos
 		dist_to_player = offset_vector.length()
 		if offset_vector.length() != 0:
@@ -76,20 +78,11 @@ class WaterMonsterAI:
 		else:
 			self.movement.y = 0
 
-		has_collided = False
 		in_front_collider = pygame.Rect(self.pos.x + self.movement.x * 20, self.pos.y - 20, 5, 10)
-		tile_pos = int(self.pos.x // self.tile_size[0]), int(self.pos.y // self.tile_size[1])
-		top_left = (tile_pos[0] - 1, tile_pos[1] - 1)
-		bottom_right = (tile_pos[0] + 1, tile_pos[1] + 1)
-
-		for row in range(top_left[1], bottom_right[1]):
-			for col in range(top_left[0], bottom_right[0]):
-				rect = level_colliders.get((col, row))
-				if rect is not None and rect.colliderect(in_front_collider):
-					if in_front_collider.colliderect(rect):
-						has_collided = True
-						self.movement.y = -5000 if in_water else -1
-						break
+
+		has_collided = collision_grid.colliderect(in_front_collider)
+		if has_collided:
+			self.movement.y = -5000 if in_water else -1
 
 		pygbase.DebugDisplay.draw_rect(self.camera.world_to_screen_rect(in_front_collider), "blue" if not has_collided else "red")
 
@@ -131,7 +124,7 @@ class WaterMonster:
 		self.water_orb_average_pos = self.water_orb_group.get_orb_average_pos()
 
 		self.level = level
-		self.level_colliders = {tile_pos: tile.rect for tile_pos, tile in self.level.tiles[0].items()}
+		self.collision_grid = level.merged_collision_grid
 
 		self.particle_manager = particle_manager
 		self.water_particle_spawner = particle_manager.add_spawner(
@@ -166,20 +159,14 @@ class WaterMonster:
 		self.pos.x += self.velocity.x * delta + 0.5 * self.acceleration.x * (delta ** 2)
 		self.rect.midbottom = self.pos
 
-		tile_pos = int(self.pos.x // self.level.tile_size[0]), int(self.pos.y // self.level.tile_size[1])
-		top_left = (tile_pos[0] - 1, tile_pos[1] - 1)
-		bottom_right = (tile_pos[0] + 1, tile_pos[1] + 1)
-
-		for row in range(top_left[1], bottom_right[1]):
-			for col in range(top_left[0], bottom_right[0]):
-				rect = self.level_colliders.get((col, row))
-				if rect is not None and rect.colliderect(self.rect):
-					if self.velocity.x > 0:
-						self.pos.x = rect.left - self.rect.width / 2
-						self.velocity.x = 0
-					elif self.velocity.x < 0:
-						self.pos.x = rect.right + self.rect.width / 2
-						self.velocity.x = 0
+		for rect in self.collision_grid.get_colliders(self.rect):
+			if rect.colliderect(self.rect):
+				if self.velocity.x > 0:
+					self.pos.x = rect.left - self.rect.width / 2
+					self.velocity.x = 0
+				elif self.velocity.x < 0:
+					self.pos.x = rect.right + self.rect.width / 2
+					self.velocity.x = 0
 
 		self.rect.midbottom = self.pos
 
@@ -197,23 +184,17 @@ class WaterMonster:
 		self.pos.y += self.velocity.y * delta + 0.5 * self.acceleration.y * (delta ** 2)
 		self.rect.midbottom = self.pos
 
-		tile_pos = int(self.pos.x // self.level.tile_size[0]), int(self.pos.y // self.level.tile_size[1])
-		top_left = (tile_pos[0] - 1, tile_pos[1] - 1)
-		bottom_right = (tile_pos[0] + 1, tile_pos[1] + 1)
-
 		self.on_ground = False
-		for row in range(top_left[1], bottom_right[1]):
-			for col in range(top_left[0], bottom_right[0]):
-				rect = self.level_colliders.get((col, row))
-				if rect is not None and rect.colliderect(self.rect):
-					if self.velocity.y > 0:
-						self.pos.y = rect.top
-						self.velocity.y = 0
-						self.on_ground = True
-
-					elif self.velocity.y < 0:
-						self.pos.y = rect.bottom + self.rect.height
-						self.velocity.y = 0
+		for rect in self.collision_grid.get_colliders(self.rect):
+			if rect.colliderect(self.rect):
+				if self.velocity.y > 0:
+					self.pos.y = rect.top
+					self.velocity.y = 0
+					self.on_ground = True
+
+				elif self.velocity.y < 0:
+					self.pos.y = rect.bottom + self.rect.height
+					self.velocity.y = 0
 
 		self.rect.midbottom = self.pos
 
@@ -231,20 +212,14 @@ class WaterMonster:
 		self.pos.x += self.velocity.x * delta + 0.5 * self.acceleration.x * (delta ** 2)
 		self.rect.midbottom = self.pos
 
-		tile_pos = int(self.pos.x // self.level.tile_size[0]), int(self.pos.y // self.level.tile_size[1])
-		top_left = (tile_pos[0] - 1, tile_pos[1] - 1)
-		bottom_right = (tile_pos[0] + 1, tile_pos[1] + 1)
-
-		for row in range(top_left[1], bottom_right[1]):
-			for col in range(top_left[0], bottom_right[0]):
-				rect = self.level_colliders.get((col, row))
-				if rect is not None and rect.colliderect(self.rect):
-					if self.velocity.x > 0:
-						self.pos.x = rect.left - self.rect.width / 2
-						self.velocity.x = 0
-					elif self.velocity.x < 0:
-						self.pos.x = rect.right + self.rect.width / 2
-						self.velocity.x = 0
+		for rect in self.collision_grid.get_colliders(self.rect):
+			if rect.colliderect(self.rect):
+				if self.velocity.x > 0:
+					self.pos.x = rect.left - self.rect.width / 2
+					self.velocity.x = 0
+				elif self.velocity.x < 0:
+					self.pos.x = rect.right + self.rect.width / 2
+					self.velocity.x = 0
 
 		self.rect.midbottom = self.pos
 
@@ -260,21 +235,15 @@ class WaterMonster:
 		self.pos.y += self.velocity.y * delta + 0.5 * self.acceleration.y * (delta ** 2)
 		self.rect.midbottom = self.pos
 
-		tile_pos = int(self.pos.x // self.level.tile_size[0]), int(self.pos.y // self.level.tile_size[1])
-		top_left = (tile_pos[0] - 1, tile_pos[1] - 1)
-		bottom_right = (tile_pos[0] + 1, tile_pos[1] + 1)
+		for rect in self.collision_grid.get_colliders(self.rect):
+			if rect.colliderect(self.rect):
+				if self.velocity.y > 0:
+					self.pos.y = rect.top
+					self.velocity.y = 0
 
-		for row in range(top_left[1], bottom_right[1]):
-			for col in range(top_left[0], bottom_right[0]):
-				rect = self.level_colliders.get((col, row))
-				if rect is not None and rect.colliderect(self.rect):
-					if self.velocity.y > 0:
-						self.pos.y = rect.top
-						self.velocity.y = 0
-
-					elif self.velocity.y < 0:
-						self.pos.y = rect.bottom + self.rect.height
-						self.velocity.y = 0
+				elif self.velocity.y < 0:
+					self.pos.y = rect.bottom + self.rect.height
+					self.velocity.y = 0
 
 		self.rect.midbottom = self.pos
 
@@ -302,7 +271,7 @@ class WaterMonster:
 
 	def update(self, delta: float, player_pos: pygame.Vector2, no_ai: bool):
 		if not no_ai:
-			self.ai.update(delta, player_pos, self.level_colliders, self.pos.y > self.water_level)
+			self.ai.update(delta, player_pos, self.collision_grid, self.pos.y > self.water_level)
 
 		self.temperature.tick(delta)
 		self.garbage_throw_timer.tick(delta)
@@ -331,6 +300,10 @@ class WaterMonster:
 	def alive(self):
 		return self.temperature.not_maxed()
 
+	def release(self):
+		# Removed without dying, to be made again later from a spawn record
+		self.particle_manager.remove_spawner(self.water_particle_spawner)
+
 	def kill(self):
 		self.particle_manager.remove_spawner(self.water_particle_spawner)
 
@@ -340,12 +313,29 @@ class WaterMonster:
 
 
 class WaterMonsterGroup:
-	def __init__(self):
+	def __init__(self, create_monster: Callable[[tuple | pygame.Vector2], WaterMonster]):
 		self.water_monsters: list[WaterMonster] = []
-		self.water_monster_ids: set[int] = set()
+		self.water_monster_ids: set[int] = set()  # Includes monsters only in spawn records, as they are still alive
 
 		self.monster_update_range = 1200
 
+		# Monsters far from the player are kept as spawn records of {id: (pos, temperature)}, and only made once the player comes near
+		self.create_monster = create_monster
+		self.spawn_records: dict[int, tuple[pygame.Vector2, float]] = {}
+		self.spawn_record_hash = SpatialHash(512)
+
+		# Past the update and draw ranges, so monsters are made before they are seen, and released well after
+		self.activation_range = 1600
+		self.release_range = 2400
+
+		# Monster positions binned into cells, rebinned as they move
+		self.spatial_hash = SpatialHash(256)
+
+		# Monsters that were in range on the last update, so their spawners can be turned off once they leave
+		self.active_monsters: set[WaterMonster] = set()
+
+		self.flame_hit_cell_size = 64
+
 		self.monster_death_sounds: list[pygame.mixer.Sound] = [pygbase.ResourceManager.get_resource("sound", sound) for sound in ["explosion", "explosion-1", "explosion-2"]]
 
 	def add_water_monster(self, monster_id: int, monster: WaterMonster):
@@ -355,51 +345,148 @@ class WaterMonsterGroup:
 		monster.id = monster_id
 		self.water_monsters.append(monster)
 
+		self.spatial_hash.add(monster, monster.pos)
+		self.active_monsters.add(monster)
+
+	def add_spawn_record(self, monster_id: int, pos: tuple | pygame.Vector2, temperature: float = 0):
+		# Monsters without an id can't be told apart, so they are always made
+		if monster_id == -1:
+			self.add_water_monster(monster_id, self.create_monster(pos))
+			return
+
+		self.water_monster_ids.add(monster_id)
+
+		pos = pygame.Vector2(pos)
+		self.spawn_records[monster_id] = (pos, temperature)
+		self.spawn_record_hash.add(monster_id, pos)
+
+	def spawn_from_record(self, monster_id: int):
+		pos, temperature = self.spawn_records.pop(monster_id)
+		self.spawn_record_hash.remove(monster_id)
+
+		water_monster = self.create_monster(pos)
+		water_monster.temperature.temperature = temperature
+		self.add_water_monster(monster_id, water_monster)
+
+	def release_to_record(self, water_monster: WaterMonster):
+		water_monster.release()
+
+		self.water_monsters.remove(water_monster)
+		self.spatial_hash.remove(water_monster)
+		self.active_monsters.discard(water_monster)
+
+		# Monsters out of range don't cool down, so the temperature is all that needs keeping
+		self.add_spawn_record(water_monster.id, water_monster.pos, water_monster.temperature.temperature)
+
 	def get_colliders(self, pos: tuple | pygame.Vector2 | None = None, radius: int = 1000) -> list[pygame.Rect]:
-		if pos is None:
-			return [water_monster.damage_collider for water_monster in self.water_monsters]
-		else:
-			return [water_monster.damage_collider for water_monster in self.water_monsters if water_monster.pos.distance_to(pos) < radius]
+		return [water_monster.damage_collider for water_monster in self.get_monsters(pos, radius)]
 
 	def get_monsters(self, pos: tuple | pygame.Vector2 | None = None, radius: int = 800) -> list[WaterMonster]:
 		if pos is None:
 			return self.water_monsters
 		else:
-			return [water_monster for water_monster in self.water_monsters if water_monster.pos.distance_to(pos) < radius]
+			return self.spatial_hash.query_radius(pos, radius)
+
+	def get_monsters_in_rect(self, rect: pygame.Rect) -> list[WaterMonster]:
+		return self.spatial_hash.query_rect(rect)
 
 	def kill_all(self, pos: tuple | pygame.Vector2):
 		for water_monster in self.water_monsters:
-			in_range = water_monster.pos.distance_to(pos) < self.monster_update_range
-
 			water_monster.kill()
 			if water_monster.id != -1:
 				self.water_monster_ids.remove(water_monster.id)
 
 		self.water_monsters.clear()
+		self.spatial_hash.clear()
+		self.active_monsters.clear()
+
+		self.water_monster_ids.difference_update(self.spawn_records.keys())
+		self.spawn_records.clear()
+		self.spawn_record_hash.clear()
 
 		for _ in range(2):
 			random.choice(self.monster_death_sounds).play()
 
+	def resolve_flame_hits(self, water_monsters: list[WaterMonster], particle_colliders: list[pygame.geometry.Circle]):
+		if len(particle_colliders) == 0:
+			return
+
+		cell_size = self.flame_hit_cell_size
+
+		# {cell_pos: circle indices}, binned by center
+		cells: dict[tuple[int, int], list[int]] = {}
+		for index, particle_collider in enumerate(particle_colliders):
+			cells.setdefault((int(particle_collider.x // cell_size), int(particle_collider.y // cell_size)), []).append(index)
+
+		# Each circle can only hit the first monster it touches
+		hit = [False] * len(particle_colliders)
+		max_radius = max(particle_collider.r for particle_collider in particle_colliders)
+
+		for water_monster in water_monsters:
+			damage_collider = water_monster.damage_collider
+
+			# Circle centers that could touch the collider lie within its rect grown by the radius
+			left = int((damage_collider.left - max_radius) // cell_size)
+			top = int((damage_collider.top - max_radius) // cell_size)
+			right = int((damage_collider.right + max_radius) // cell_size)
+			bottom = int((damage_collider.bottom + max_radius) // cell_size)
+
+			num_hits = 0
+			for row in range(top, bottom + 1):
+				for col in range(left, right + 1):
+					cell = cells.get((col, row))
+					if cell is None:
+						continue
+
+					for index in cell:
+						if not hit[index] and particle_colliders[index].colliderect(damage_collider):
+							hit[index] = True
+							num_hits += 1
+
+			if num_hits != 0:
+				water_monster.temperature.heat(10 * num_hits)
+
 	def update(self, delta: float, pos: tuple | pygame.Vector2, particle_colliders: list[pygame.geometry.Circle], camera: pygbase.Camera, should_update: set):
-		for water_monster in self.water_monsters:
-			in_range = water_monster.pos.distance_to(pos) < self.monster_update_range
+		# Monsters near the player, or in the focal point being fought, are made from their spawn records
+		for monster_id in self.spawn_record_hash.query_radius(pos, self.activation_range):
+			self.spawn_from_record(monster_id)
+		for monster_id in should_update & self.spawn_records.keys():
+			self.spawn_from_record(monster_id)
+
+		# Monsters out of range do not move or heat up, so only the ones in range need to be looked at
+		in_range_monsters = self.spatial_hash.query_radius(pos, self.monster_update_range)
+
+		for water_monster in in_range_monsters:
+			water_monster.update(delta, pos, water_monster.id != -1 and water_monster.id not in should_update)
+			self.spatial_hash.move(water_monster)
+
+			water_monster.water_particle_spawner.active = True
+
+		self.resolve_flame_hits(in_range_monsters, particle_colliders)
 
-			if in_range:
-				water_monster.update(delta, pos, water_monster.id != -1 and water_monster.id not in should_update)
+		dead_monsters = [water_monster for water_monster in in_range_monsters if not water_monster.alive()]
 
-				for particle_collider in particle_colliders[:]:
-					if particle_collider.colliderect(water_monster.damage_collider):
-						water_monster.temperature.heat(10)
-						particle_colliders.remove(particle_collider)
+		in_range_monsters = set(in_range_monsters)
+		for water_monster in self.active_monsters - in_range_monsters:
+			water_monster.water_particle_spawner.active = False
+		self.active_monsters = in_range_monsters
 
-			water_monster.water_particle_spawner.active = in_range
+		for water_monster in dead_monsters:
+			water_monster.kill()
+			camera.shake_screen(0.5)
+			if water_monster.id != -1:
+				self.water_monster_ids.remove(water_monster.id)
+
+			random.choice(self.monster_death_sounds).play()
 
-			if not water_monster.alive():
-				water_monster.kill()
-				camera.shake_screen(0.5)
-				if water_monster.id != -1:
-					self.water_monster_ids.remove(water_monster.id)
+			self.spatial_hash.remove(water_monster)
+			self.active_monsters.discard(water_monster)
 
-				random.choice(self.monster_death_sounds).play()
+		if len(dead_monsters) != 0:
+			self.water_monsters[:] = [water_monster for water_monster in self.water_monsters if water_monster.alive()]
 
-		self.water_monsters[:] = [water_monster for water_monster in self.water_monsters if water_monster.alive()]
+		# Far away monsters go back to spawn records, apart from summoned ones that have no id
+		if len(self.water_monsters) > len(in_range_monsters):
+			near_monsters = set(self.spatial_hash.query_radius(pos, self.release_range))
+			for water_monster in [water_monster for water_monster in self.water_monsters if water_monster not in near_monsters and water_monster.id != -1 and water_monster.id not in should_update]:
+				self.release_to_record(water_monster)
@@ -1,131 +1,117 @@
 import random
 
+import numpy as np
 import pygame
 import pygbase
 
 
-class WaterOrb:
+class WaterOrbGroup:
 	GRAVITY = 70
 
 	ATTRACTION = 7
 	DEFLECTION = 300
+	DEFLECTION_RADIUS = 15
 
 	MAX_SPEED = 100
 
-	def __init__(self, pos: tuple, size: float, color: str | tuple, outline_size: int = 3, outline_color: str | tuple = (230, 230, 230), attraction_offset: tuple = (0, 0)):
-		self.acceleration = pygame.Vector2()
-		self.velocity = pygame.Vector2()
+	def __init__(self, pos: tuple, offset: tuple, num_orbs: int, orb_size_range: tuple[float, float], attraction_offset_range: tuple[tuple, tuple] = ((0, 0), (0, 0)), outline_size: int = 3, outline_color: str | tuple = (230, 230, 230)):
 		self.pos = pygame.Vector2(pos)
+		self.offset = offset
 
-		self.size = size
-		self.outline_size = outline_size
-
-		self.color = color
-		self.outline_color = outline_color
-
-		self.attraction_offset = pygame.Vector2(attraction_offset)
-
-	def update(self, delta: float, attraction_point: pygame.Vector2 | tuple, deflectors: list[pygame.Vector2]):
-		self.acceleration.y = self.GRAVITY
-
-		# This is the most messed up physics I've ever written
-		# Attraction
-		attraction_vector = ((attraction_point + self.attraction_offset) - self.pos)
-		attractor_distance = attraction_vector.length()
-
-		if attractor_distance < 5:
-			attraction_scaler = 0
-		elif attraction_vector.dot(self.velocity) < 0:  # Moving away
-			attraction_scaler = 3
-		else:
-			attraction_scaler = 1
-
-		attraction_vector.normalize_ip()
-		attraction_vector.x *= 0.5 * attraction_scaler  # Reduce x movement
-		attraction_vector.y *= 2.0
-
-		self.acceleration += attraction_vector * (self.ATTRACTION * attraction_scaler * (attractor_distance ** 0.5))
+		self.water_colors = pygbase.Common.get_value("water_monster_colors")
 
-		# Deflection
-		for deflector in deflectors:
-			deflection_vector = (self.pos - deflector)
-			deflector_distance = deflection_vector.length()
+		self.num_orbs = num_orbs
+		self.orb_size_range = orb_size_range
 
-			deflection_vector.normalize_ip()
+		self.outline_size = outline_size
+		self.outline_color = outline_color
 
-			self.acceleration += deflection_vector * min((self.DEFLECTION / deflector_distance ** 1.3), 800)
+		# Orbs are stored as arrays, one row per orb
+		self.accelerations = np.zeros((num_orbs, 2))
+		self.velocities = np.zeros((num_orbs, 2))
+		self.positions = np.zeros((num_orbs, 2))
+		self.attraction_offsets = np.zeros((num_orbs, 2))
+		self.sizes = np.zeros(num_orbs)
+		self.color_indices = np.zeros(num_orbs, dtype=int)
 
-		self.acceleration.x += self.acceleration.x * -4.0 * delta  # Damp the x
-		self.acceleration.x += self.velocity.x * -4.0 * delta  # Damp the x
+		for index in range(num_orbs):
+			color_index = random.randrange(len(self.water_colors))
 
-		self.velocity += self.acceleration * delta
-		self.velocity.x = pygame.math.clamp(self.velocity.x, -self.MAX_SPEED, self.MAX_SPEED)
-		self.velocity.y = pygame.math.clamp(self.velocity.y, -self.MAX_SPEED, self.MAX_SPEED)
+			spawn_offset = pygbase.utils.get_angled_vector(random.uniform(0, 360), random.uniform(0, orb_size_range[1] * 2))
+			spawn_offset.x *= 0.5
 
-		self.pos += self.velocity * delta + 0.5 * self.acceleration * (delta ** 2)
+			self.color_indices[index] = color_index
+			self.positions[index] = self.pos + self.offset + spawn_offset
+			self.sizes[index] = random.uniform(*orb_size_range)
+			self.attraction_offsets[index] = random.uniform(*attraction_offset_range[0]), random.uniform(*attraction_offset_range[1])
 
-	def draw_water(self, surface: pygame.Surface, camera: pygbase.Camera):
-		pygame.draw.circle(surface, self.color, camera.world_to_screen(self.pos), self.size)
+		# Orbs only deflect orbs of the same color
+		self.same_color = (self.color_indices[:, np.newaxis] == self.color_indices[np.newaxis, :]) & ~np.eye(num_orbs, dtype=bool)
 
-	def draw_outline(self, surface: pygame.Surface, camera: pygbase.Camera):
-		pygame.draw.circle(surface, self.outline_color, camera.world_to_screen(self.pos), self.size + self.outline_size)
+		# {color: orb indices}
+		self.color_orbs: dict[str | tuple, np.ndarray] = {}
+		for color_index, color in enumerate(self.water_colors):
+			orb_indices = np.flatnonzero(self.color_indices == color_index)
+			if len(orb_indices) != 0:
+				self.color_orbs[color] = orb_indices
 
-	def draw_inner_clear(self, surface: pygame.Surface, camera: pygbase.Camera):
-		pygame.draw.circle(surface, (0, 0, 0, 0), camera.world_to_screen(self.pos), self.size)
+	def link_pos(self, pos: pygame.Vector2) -> "WaterOrbGroup":
+		self.pos = pos
+		return self
 
+	def get_orb_average_pos(self):
+		return pygame.Vector2(self.positions.mean(axis=0).tolist())
 
-class WaterOrbGroup:
-	def __init__(self, pos: tuple, offset: tuple, num_orbs: int, orb_size_range: tuple[float, float], attraction_offset_range: tuple[tuple, tuple] = ((0, 0), (0, 0))):
+	def update(self, delta: float):
+		camera: pygbase.Camera = pygbase.Common.get_value("camera")
+		pygbase.DebugDisplay.draw_circle(camera.world_to_screen(self.pos + self.offset), 5, "yellow")
 
-		self.pos = pygame.Vector2(pos)
-		self.offset = offset
+		self.accelerations[:, 1] = self.GRAVITY
 
-		self.water_colors = pygbase.Common.get_value("water_monster_colors")
+		# Attraction
+		attraction_vectors = (self.pos.x + self.offset[0], self.pos.y + self.offset[1]) + self.attraction_offsets - self.positions
+		attractor_distances = np.linalg.norm(attraction_vectors, axis=1)
 
-		self.num_orbs = num_orbs
-		self.orb_size_range = orb_size_range
-		self.water_orbs: dict[str | tuple, list[WaterOrb]] = {}
-		for _ in range(num_orbs):
-			color = random.choice(self.water_colors)
+		attraction_scalers = np.where(
+			attractor_distances < 5, 0.0,
+			np.where((attraction_vectors * self.velocities).sum(axis=1) < 0, 3.0, 1.0)  # Pulled harder when moving away
+		)
 
-			spawn_offset = pygbase.utils.get_angled_vector(random.uniform(0, 360), random.uniform(0, orb_size_range[1] * 2))
-			spawn_offset.x *= 0.5
+		attraction_vectors /= np.maximum(attractor_distances, 1e-9)[:, np.newaxis]
+		attraction_vectors[:, 0] *= 0.5 * attraction_scalers  # Reduce x movement
+		attraction_vectors[:, 1] *= 2.0
 
-			self.water_orbs.setdefault(color, []).append(WaterOrb(
-				self.pos + self.offset + spawn_offset, random.uniform(*orb_size_range), color,
-				attraction_offset=(random.uniform(*attraction_offset_range[0]), random.uniform(*attraction_offset_range[1]))
-			))
+		self.accelerations += attraction_vectors * (self.ATTRACTION * attraction_scalers * np.sqrt(attractor_distances))[:, np.newaxis]
 
-	def link_pos(self, pos: pygame.Vector2) -> "WaterOrbGroup":
-		self.pos = pos
-		return self
+		# Deflection from every nearby orb of the same color
+		deflection_vectors = self.positions[:, np.newaxis, :] - self.positions[np.newaxis, :, :]
+		deflector_distances = np.linalg.norm(deflection_vectors, axis=2)
 
-	def get_orb_average_pos(self):
-		pos_sum = pygame.Vector2()
+		deflects = self.same_color & (deflector_distances < self.DEFLECTION_RADIUS) & (deflector_distances > 0)
+		safe_distances = np.where(deflects, deflector_distances, 1.0)
 
-		for water_orbs in self.water_orbs.values():
-			for orb in water_orbs:
-				pos_sum += orb.pos
+		deflection_strengths = np.where(deflects, np.minimum(self.DEFLECTION / safe_distances ** 1.3, 800) / safe_distances, 0.0)
+		self.accelerations += (deflection_vectors * deflection_strengths[:, :, np.newaxis]).sum(axis=1)
 
-		return pos_sum / self.num_orbs
+		# Damp the x
+		self.accelerations[:, 0] += self.accelerations[:, 0] * -4.0 * delta
+		self.accelerations[:, 0] += self.velocities[:, 0] * -4.0 * delta
 
-	def update(self, delta: float):
-		camera: pygbase.Camera = pygbase.Common.get_value("camera")
-		pygbase.DebugDisplay.draw_circle(camera.world_to_screen(self.pos + self.offset), 5, "yellow")
+		self.velocities += self.accelerations * delta
+		np.clip(self.velocities, -self.MAX_SPEED, self.MAX_SPEED, out=self.velocities)
 
-		for water_orbs in self.water_orbs.values():
-			for orb in water_orbs:
-				orb.update(delta, self.pos + self.offset, [deflect_orb.pos for deflect_orb in water_orbs if deflect_orb is not orb and deflect_orb.pos.distance_to(orb.pos) < 15])
+		self.positions += self.velocities * delta + 0.5 * self.accelerations * (delta ** 2)
 
 	def draw(self, outline_draw_surface, water_draw_surfaces, camera: pygbase.Camera):
-		for water_orbs in self.water_orbs.values():
-			for orb in water_orbs:
-				orb.draw_outline(outline_draw_surface, camera)
-		for water_orbs in self.water_orbs.values():
-			for orb in water_orbs:
-				orb.draw_inner_clear(outline_draw_surface, camera)
+		screen_positions = [camera.world_to_screen(pos) for pos in self.positions.tolist()]
+		sizes = self.sizes.tolist()
+
+		for screen_pos, size in zip(screen_positions, sizes):
+			pygame.draw.circle(outline_draw_surface, self.outline_color, screen_pos, size + self.outline_size)
+		for screen_pos, size in zip(screen_positions, sizes):
+			pygame.draw.circle(outline_draw_surface, (0, 0, 0, 0), screen_pos, size)
 
 		for color, water_draw_surface in water_draw_surfaces.items():
-			if color in self.water_orbs:
-				for orb in self.water_orbs[color]:
-					orb.draw_water(water_draw_surface, camera)
+			if color in self.color_orbs:
+				for index in self.color_orbs[color].tolist():
+					pygame.draw.circle(water_draw_surface, color, screen_positions[index], sizes[index])